@@ -15,6 +15,9 @@ Example:
 
 __version__ = "0.51.6"
 
+import importlib
+from typing import TYPE_CHECKING
+
 # Re-export pipy-ai types that agent users need
 from pipy_ai import (
     # Messages & Content (for building prompts)
@@ -33,6 +36,7 @@ from pipy_ai import (
     ThinkingLevel,
     StopReason,
     # Options
+    CacheRetention,
     ThinkingBudgets,
     # Cancellation
     AbortSignal,
@@ -49,6 +53,7 @@ from .types import (
     tool,
     # Message
     AgentMessage,
+    AGENT_MESSAGE_ADAPTER,
     # State
     AgentState,
     # Events
@@ -63,19 +68,45 @@ from .types import (
     ToolExecutionStartEvent,
     ToolExecutionUpdateEvent,
     ToolExecutionEndEvent,
+    AGENT_EVENT_ADAPTER,
     # Config
     AgentLoopConfig,
 )
 
-# Agent class
-from .agent import Agent
+if TYPE_CHECKING:
+    # Agent class
+    from .agent import Agent
+
+    # Loop functions
+    from .loop import (
+        agent_loop,
+        agent_loop_continue,
+        default_convert_to_llm,
+    )
+
+# The agent and loop call pipy-ai's streaming API, which loads litellm; they are
+# imported on first attribute access (PEP 562) so importing the types does not
+# pull in litellm.
+_LAZY_IMPORTS = {
+    "Agent": ".agent",
+    "agent_loop": ".loop",
+    "agent_loop_continue": ".loop",
+    "default_convert_to_llm": ".loop",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
 
-# Loop functions
-from .loop import (
-    agent_loop,
-    agent_loop_continue,
-    default_convert_to_llm,
-)
 
 __all__ = [
     # Version
@@ -93,6 +124,7 @@ __all__ = [
     "Tool",
     "ThinkingLevel",
     "StopReason",
+    "CacheRetention",
     "ThinkingBudgets",
     "AbortSignal",
     "AbortController",
@@ -104,6 +136,7 @@ __all__ = [
     "AgentToolUpdateCallback",
     "tool",
     "AgentMessage",
+    "AGENT_MESSAGE_ADAPTER",
     "AgentState",
     "AgentLoopConfig",
     # Events
@@ -118,6 +151,7 @@ __all__ = [
     "ToolExecutionStartEvent",
     "ToolExecutionUpdateEvent",
     "ToolExecutionEndEvent",
+    "AGENT_EVENT_ADAPTER",
     # Loop
     "agent_loop",
     "agent_loop_continue",
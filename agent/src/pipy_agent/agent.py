@@ -1,28 +1,37 @@
 """Agent class with state management."""
 
+from __future__ import annotations
+
+from collections import deque
 from typing import Callable
 
 from pipy_ai import (
-    UserMessage,
+    AbortController,
+    CacheRetention,
     ImageContent,
     TextContent,
-    ThinkingLevel,
     ThinkingBudgets,
-    AbortController,
+    ThinkingLevel,
+    UserMessage,
 )
 
+from .loop import agent_loop, agent_loop_continue, default_convert_to_llm
 from .types import (
+    AgentEndEvent,
+    AgentEvent,
+    AgentLoopConfig,
     AgentMessage,
     AgentState,
     AgentTool,
-    AgentEvent,
-    AgentEndEvent,
-    AgentLoopConfig,
     ConvertToLlmFn,
-    TransformContextFn,
     GetApiKeyFn,
+    MessageEndEvent,
+    MessageStartEvent,
+    MessageUpdateEvent,
+    ToolExecutionEndEvent,
+    ToolExecutionStartEvent,
+    TransformContextFn,
 )
-from .loop import agent_loop, agent_loop_continue, default_convert_to_llm
 
 
 class Agent:
@@ -38,6 +47,26 @@ class Agent:
         await agent.prompt("What's the weather?")
     """
 
+    __slots__ = (
+        "_state",
+        "_listeners",
+        "_listener_snapshot",
+        "_next_listener_id",
+        "_abort",
+        "_convert_to_llm",
+        "_transform_context",
+        "_get_api_key",
+        "_steering_queue",
+        "_follow_up_queue",
+        "_steering_mode",
+        "_follow_up_mode",
+        "_session_id",
+        "_thinking_budgets",
+        "_max_retry_delay_ms",
+        "_cache_retention",
+        "_state_handlers",
+    )
+
     def __init__(
         self,
         model: str = "anthropic/claude-sonnet-4-5",
@@ -51,24 +80,39 @@ class Agent:
         session_id: str | None = None,
         thinking_budgets: ThinkingBudgets | None = None,
         max_retry_delay_ms: int | None = None,
+        cache_retention: CacheRetention = CacheRetention.NONE,
     ):
         self._state = AgentState(
             model=model,
             system_prompt=system_prompt,
             tools=tools or [],
         )
-        self._listeners: set[Callable[[AgentEvent], None]] = set()
+        # Token -> listener; dict order keeps emission in subscription order
+        self._listeners: dict[int, Callable[[AgentEvent], None]] = {}
+        self._next_listener_id = 0
+        # Immutable snapshot iterated by _emit; rebuilt on (un)subscribe
+        self._listener_snapshot: tuple[Callable[[AgentEvent], None], ...] = ()
         self._abort: AbortController | None = None
         self._convert_to_llm = convert_to_llm or default_convert_to_llm
         self._transform_context = transform_context
         self._get_api_key = get_api_key
-        self._steering_queue: list[AgentMessage] = []
-        self._follow_up_queue: list[AgentMessage] = []
+        self._steering_queue: deque[AgentMessage] = deque()
+        self._follow_up_queue: deque[AgentMessage] = deque()
         self._steering_mode = steering_mode
         self._follow_up_mode = follow_up_mode
         self._session_id = session_id
         self._thinking_budgets = thinking_budgets
         self._max_retry_delay_ms = max_retry_delay_ms
+        self._cache_retention = cache_retention
+        # event.type -> state update, used by _update_state
+        self._state_handlers: dict[str, Callable[[AgentEvent], None]] = {
+            "message_start": self._on_message_start,
+            "message_update": self._on_message_update,
+            "message_end": self._on_message_end,
+            "tool_execution_start": self._on_tool_execution_start,
+            "tool_execution_end": self._on_tool_execution_end,
+            "agent_end": self._on_agent_end,
+        }
 
     @property
     def state(self) -> AgentState:
@@ -141,11 +185,20 @@ class Agent:
 
     def subscribe(self, fn: Callable[[AgentEvent], None]) -> Callable[[], None]:
         """Subscribe to agent events. Returns unsubscribe function."""
-        self._listeners.add(fn)
-        return lambda: self._listeners.discard(fn)
+        token = self._next_listener_id
+        self._next_listener_id += 1
+        self._listeners[token] = fn
+        self._listener_snapshot = tuple(self._listeners.values())
+
+        def unsubscribe():
+            if self._listeners.pop(token, None) is not None:
+                self._listener_snapshot = tuple(self._listeners.values())
+
+        return unsubscribe
 
     def _emit(self, event: AgentEvent):
-        for fn in self._listeners:
+        # Iterate the snapshot so listeners may (un)subscribe while handling an event
+        for fn in self._listener_snapshot:
             fn(event)
 
     # === Queues ===
@@ -159,8 +212,12 @@ class Agent:
         self._follow_up_queue.append(message)
 
     def clear_queues(self):
-        self._steering_queue = []
-        self._follow_up_queue = []
+        self._steering_queue.clear()
+        self._follow_up_queue.clear()
+
+    def has_queued_messages(self) -> bool:
+        """True if steering or follow-up messages are waiting."""
+        return bool(self._steering_queue or self._follow_up_queue)
 
     # === Control ===
 
@@ -230,14 +287,16 @@ class Agent:
             session_id=self._session_id,
             thinking_budgets=self._thinking_budgets,
             max_retry_delay_ms=self._max_retry_delay_ms,
+            cache_retention=self._cache_retention,
         )
 
+        # The loop takes its own working copy of the history, so pass state directly
         try:
             if prompts:
                 stream = agent_loop(
                     prompts,
                     system_prompt=self._state.system_prompt,
-                    messages=list(self._state.messages),
+                    messages=self._state.messages,
                     tools=self._state.tools,
                     config=config,
                     signal=self._abort.signal,
@@ -246,11 +305,12 @@ class Agent:
                     get_api_key=self._get_api_key,
                     get_steering_messages=self._get_steering,
                     get_follow_up_messages=self._get_follow_up,
+                    has_queued_messages=self.has_queued_messages,
                 )
             else:
                 stream = agent_loop_continue(
                     system_prompt=self._state.system_prompt,
-                    messages=list(self._state.messages),
+                    messages=self._state.messages,
                     tools=self._state.tools,
                     config=config,
                     signal=self._abort.signal,
@@ -259,11 +319,15 @@ class Agent:
                     get_api_key=self._get_api_key,
                     get_steering_messages=self._get_steering,
                     get_follow_up_messages=self._get_follow_up,
+                    has_queued_messages=self.has_queued_messages,
                 )
 
+            # Bound once: this runs for every streamed event
+            update_state = self._update_state
+            emit = self._emit
             async for event in stream:
-                self._update_state(event)
-                self._emit(event)
+                update_state(event)
+                emit(event)
 
         except Exception as e:
             self._state.error = str(e)
@@ -277,38 +341,45 @@ class Agent:
 
     def _update_state(self, event: AgentEvent):
         """Update internal state based on event."""
-        match event.type:
-            case "message_start":
-                if hasattr(event, "message") and event.message.role == "assistant":
-                    self._state.stream_message = event.message
-            case "message_update":
-                self._state.stream_message = event.message
-            case "message_end":
-                self._state.stream_message = None
-                self.append_message(event.message)
-            case "tool_execution_start":
-                self._state.pending_tool_calls.add(event.tool_call_id)
-            case "tool_execution_end":
-                self._state.pending_tool_calls.discard(event.tool_call_id)
-            case "agent_end":
-                self._state.is_streaming = False
+        handler = self._state_handlers.get(event.type)
+        if handler:
+            handler(event)
+
+    def _on_message_start(self, event: MessageStartEvent):
+        if event.message.role == "assistant":
+            self._state.stream_message = event.message
+
+    def _on_message_update(self, event: MessageUpdateEvent):
+        self._state.stream_message = event.message
+
+    def _on_message_end(self, event: MessageEndEvent):
+        self._state.stream_message = None
+        self.append_message(event.message)
+
+    def _on_tool_execution_start(self, event: ToolExecutionStartEvent):
+        self._state.pending_tool_calls.add(event.tool_call_id)
+
+    def _on_tool_execution_end(self, event: ToolExecutionEndEvent):
+        self._state.pending_tool_calls.discard(event.tool_call_id)
+
+    def _on_agent_end(self, event: AgentEndEvent):
+        self._state.is_streaming = False
 
     async def _get_steering(self) -> list[AgentMessage]:
         """Get steering messages from queue."""
-        if not self._steering_queue:
-            return []
-        if self._steering_mode == "one-at-a-time":
-            return [self._steering_queue.pop(0)]
-        msgs = self._steering_queue
-        self._steering_queue = []
-        return msgs
+        return _drain(self._steering_queue, self._steering_mode)
 
     async def _get_follow_up(self) -> list[AgentMessage]:
         """Get follow-up messages from queue."""
-        if not self._follow_up_queue:
-            return []
-        if self._follow_up_mode == "one-at-a-time":
-            return [self._follow_up_queue.pop(0)]
-        msgs = self._follow_up_queue
-        self._follow_up_queue = []
-        return msgs
+        return _drain(self._follow_up_queue, self._follow_up_mode)
+
+
+def _drain(queue: deque[AgentMessage], mode: str) -> list[AgentMessage]:
+    """Take the next message ("one-at-a-time") or everything ("all") from a queue."""
+    if not queue:
+        return []
+    if mode == "one-at-a-time":
+        return [queue.popleft()]
+    msgs = list(queue)
+    queue.clear()
+    return msgs
@@ -1,46 +1,90 @@
 """Agent loop implementation using pipy-ai for LLM calls."""
 
-from typing import AsyncIterator
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from typing import AsyncIterator, Awaitable, Callable
 
 from pipy_ai import (
-    astream,
+    AbortError,
+    AbortSignal,
+    AssistantMessage,
+    AssistantMessageEvent,
     Context,
     Message,
-    AssistantMessage,
-    ToolResultMessage,
-    TextContent,
     SimpleStreamOptions,
+    TextContent,
     ThinkingLevel,
-    AbortSignal,
-    AbortError,
     ToolCall,
+    ToolResultMessage,
+    UserMessage,
+    astream,
 )
 
 from .types import (
+    AgentEndEvent,
+    AgentEvent,
+    AgentLoopConfig,
     AgentMessage,
+    AgentStartEvent,
     AgentTool,
     AgentToolResult,
-    AgentLoopConfig,
-    AgentEvent,
-    AgentStartEvent,
-    AgentEndEvent,
-    TurnStartEvent,
-    TurnEndEvent,
+    ConvertToLlmFn,
+    GetApiKeyFn,
+    GetMessagesFn,
+    MessageEndEvent,
     MessageStartEvent,
     MessageUpdateEvent,
-    MessageEndEvent,
-    ToolExecutionStartEvent,
     ToolExecutionEndEvent,
-    ConvertToLlmFn,
+    ToolExecutionStartEvent,
     TransformContextFn,
-    GetApiKeyFn,
-    GetMessagesFn,
+    TurnEndEvent,
+    TurnStartEvent,
 )
 
+# Streaming deltas that can be coalesced into one MessageUpdateEvent
+_DELTA_EVENT_TYPES = frozenset(("text_delta", "thinking_delta", "toolcall_delta"))
+
+# Content block boundaries, forwarded as-is
+_BLOCK_EVENT_TYPES = frozenset(
+    (
+        "text_start",
+        "text_end",
+        "thinking_start",
+        "thinking_end",
+        "toolcall_start",
+        "toolcall_end",
+    )
+)
+
+# Minimum gap between MessageUpdateEvents for consecutive deltas (~60 updates/s)
+_UPDATE_FLUSH_INTERVAL_NS = 16_000_000
+
+# Roles pipy-ai can send to a provider
+_LLM_ROLES = frozenset(("user", "assistant", "toolResult"))
+
+# Exact pipy-ai message classes, checked before falling back to the role
+_LLM_MESSAGE_TYPES = frozenset((UserMessage, AssistantMessage, ToolResultMessage))
+
+
+def _is_llm_message(m: AgentMessage) -> bool:
+    return type(m) in _LLM_MESSAGE_TYPES or m.role in _LLM_ROLES
+
 
 def default_convert_to_llm(messages: list[AgentMessage]) -> list[Message]:
-    """Default: keep only LLM-compatible messages."""
-    return [m for m in messages if m.role in ("user", "assistant", "toolResult")]
+    """Default: keep only LLM-compatible messages.
+
+    Returns the input list unchanged when nothing is filtered, so repeated
+    turns hand the provider an identical message prefix. A new list is only
+    built once the first non-LLM message is found.
+    """
+    llm_types = _LLM_MESSAGE_TYPES
+    for i, m in enumerate(messages):
+        if type(m) not in llm_types and m.role not in _LLM_ROLES:
+            return messages[:i] + [m for m in messages[i + 1 :] if _is_llm_message(m)]
+    return messages
 
 
 async def agent_loop(
@@ -56,6 +100,7 @@ async def agent_loop(
     get_api_key: GetApiKeyFn | None = None,
     get_steering_messages: GetMessagesFn | None = None,
     get_follow_up_messages: GetMessagesFn | None = None,
+    has_queued_messages: Callable[[], bool] | None = None,
 ) -> AsyncIterator[AgentEvent]:
     """Run agent loop with new prompt messages.
 
@@ -71,6 +116,8 @@ async def agent_loop(
         get_api_key: Resolve API key dynamically
         get_steering_messages: Get messages to inject mid-run
         get_follow_up_messages: Get messages to process after completion
+        has_queued_messages: Cheap check whether steering or follow-up messages
+            may be waiting; when it returns False those callbacks are not awaited
 
     Yields:
         AgentEvent for UI updates
@@ -86,22 +133,18 @@ async def agent_loop(
                 print(event.message.text, end="")
     """
     convert = convert_to_llm or default_convert_to_llm
-    current_messages = list(messages or []) + list(prompts)
-    new_messages: list[AgentMessage] = list(prompts)
 
     yield AgentStartEvent()
     yield TurnStartEvent()
 
-    # Emit events for prompt messages
-    for prompt in prompts:
-        yield MessageStartEvent(message=prompt)
-        yield MessageEndEvent(message=prompt)
-
-    # Run the loop
+    # Prompts go through the same pending-message path as steering, which
+    # emits their start/end events and adds them to the conversation.
+    # The loop owns its working list, callers keep theirs.
     async for event in _run_loop(
         system_prompt=system_prompt,
-        messages=current_messages,
-        new_messages=new_messages,
+        messages=list(messages or ()),
+        new_messages=[],
+        pending=list(prompts),
         tools=tools,
         config=config,
         signal=signal,
@@ -110,6 +153,7 @@ async def agent_loop(
         get_api_key=get_api_key,
         get_steering_messages=get_steering_messages,
         get_follow_up_messages=get_follow_up_messages,
+        has_queued_messages=has_queued_messages or _always_queued,
     ):
         yield event
 
@@ -126,6 +170,7 @@ async def agent_loop_continue(
     get_api_key: GetApiKeyFn | None = None,
     get_steering_messages: GetMessagesFn | None = None,
     get_follow_up_messages: GetMessagesFn | None = None,
+    has_queued_messages: Callable[[], bool] | None = None,
 ) -> AsyncIterator[AgentEvent]:
     """Continue agent loop from existing context (for retry)."""
     if not messages:
@@ -142,6 +187,7 @@ async def agent_loop_continue(
         system_prompt=system_prompt,
         messages=list(messages),
         new_messages=[],
+        pending=[],
         tools=tools,
         config=config,
         signal=signal,
@@ -150,6 +196,7 @@ async def agent_loop_continue(
         get_api_key=get_api_key,
         get_steering_messages=get_steering_messages,
         get_follow_up_messages=get_follow_up_messages,
+        has_queued_messages=has_queued_messages or _always_queued,
     ):
         yield event
 
@@ -158,6 +205,7 @@ async def _run_loop(
     system_prompt: str,
     messages: list[AgentMessage],
     new_messages: list[AgentMessage],
+    pending: list[AgentMessage],
     tools: list[AgentTool] | None,
     config: AgentLoopConfig,
     signal: AbortSignal | None,
@@ -166,14 +214,28 @@ async def _run_loop(
     get_api_key: GetApiKeyFn | None,
     get_steering_messages: GetMessagesFn | None,
     get_follow_up_messages: GetMessagesFn | None,
+    has_queued_messages: Callable[[], bool],
 ) -> AsyncIterator[AgentEvent]:
     """Main loop logic."""
     first_turn = True
-    pending: list[AgentMessage] = []
-
-    # Check for steering at start
-    if get_steering_messages:
-        pending = await get_steering_messages()
+    # Convert tools once per run so every turn sends a byte-identical tool prefix
+    # (keeps provider prompt caches warm across a tool-calling loop).
+    tool_schemas = [t.to_tool() for t in tools] if tools else None
+    # One pipy-ai context per run; only its messages change between turns
+    context = Context(system_prompt=system_prompt, tools=tool_schemas)
+    # Name -> tool for O(1) dispatch; reversed so the first tool with a name wins
+    tool_index = {t.name: t for t in reversed(tools)} if tools else {}
+    resolve_api_key = _make_api_key_resolver(get_api_key) if get_api_key else None
+    # default_convert_to_llm filters message by message and the working list is
+    # append-only, so the converted history can be extended with just the new
+    # tail each turn. Custom converters and transform_context see it all.
+    incremental = convert_to_llm is default_convert_to_llm and transform_context is None
+    llm_history: list[Message] = []
+    converted_len = 0
+
+    # Check for steering at start (queued behind any prompts)
+    if get_steering_messages and has_queued_messages():
+        pending.extend(await get_steering_messages())
 
     # Outer loop: continues when follow-up messages arrive
     while True:
@@ -187,26 +249,39 @@ async def _run_loop(
             first_turn = False
 
             # Process pending messages
-            for msg in pending:
-                yield MessageStartEvent(message=msg)
-                yield MessageEndEvent(message=msg)
-                messages.append(msg)
-                new_messages.append(msg)
-            pending = []
-
-            # Stream assistant response
-            assistant_msg, events = await _stream_response(
-                system_prompt,
+            if pending:
+                for msg in pending:
+                    yield MessageStartEvent(message=msg)
+                    yield MessageEndEvent(message=msg)
+                messages.extend(pending)
+                new_messages.extend(pending)
+                pending = []
+
+            # Build the LLM view of the conversation
+            if incremental:
+                llm_history.extend(convert_to_llm(messages[converted_len:]))
+                converted_len = len(messages)
+                llm_messages = llm_history
+            else:
+                ctx_messages = messages
+                if transform_context:
+                    ctx_messages = await transform_context(messages, signal)
+                llm_messages = convert_to_llm(ctx_messages)
+
+            # Stream assistant response (events are forwarded as they arrive;
+            # the final AssistantMessage is yielded last)
+            context.messages = llm_messages
+            async for item in _stream_response(
+                context,
                 messages,
-                tools,
                 config,
                 signal,
-                convert_to_llm,
-                transform_context,
-                get_api_key,
-            )
-            for event in events:
-                yield event
+                resolve_api_key,
+            ):
+                if isinstance(item, AssistantMessage):
+                    assistant_msg = item
+                else:
+                    yield item
             new_messages.append(assistant_msg)
 
             if assistant_msg.stop_reason in ("error", "aborted"):
@@ -214,14 +289,15 @@ async def _run_loop(
                 yield AgentEndEvent(messages=new_messages)
                 return
 
-            # Execute tool calls
+            # Execute tool calls. Stray calls in a tool-less run still get a
+            # "Tool not found" result so every tool_use has its tool_result.
             tool_calls = [c for c in assistant_msg.content if isinstance(c, ToolCall)]
             has_tool_calls = len(tool_calls) > 0
 
             tool_results: list[ToolResultMessage] = []
             if has_tool_calls:
                 async for item in _execute_tools(
-                    tools, assistant_msg, signal, get_steering_messages
+                    tool_index, tool_calls, signal, get_steering_messages, has_queued_messages
                 ):
                     if isinstance(item, ToolResultMessage):
                         tool_results.append(item)
@@ -237,11 +313,12 @@ async def _run_loop(
             # Get more steering
             if steering_after_tools:
                 pending = steering_after_tools
-            elif get_steering_messages:
+                steering_after_tools = None
+            elif get_steering_messages and has_queued_messages():
                 pending = await get_steering_messages()
 
         # Check for follow-up
-        if get_follow_up_messages:
+        if get_follow_up_messages and has_queued_messages():
             follow_up = await get_follow_up_messages()
             if follow_up:
                 pending = follow_up
@@ -251,41 +328,52 @@ async def _run_loop(
     yield AgentEndEvent(messages=new_messages)
 
 
+def _always_queued() -> bool:
+    """Default has_queued_messages: without a cheap check, always ask."""
+    return True
+
+
+def _make_api_key_resolver(get_api_key: GetApiKeyFn) -> Callable[[str], Awaitable[str | None]]:
+    """Specialise get_api_key once per run into an awaitable resolver.
+
+    Coroutine functions are used as-is; plain callables are wrapped, and only
+    they need to check whether their result is awaitable.
+    """
+    if inspect.iscoroutinefunction(get_api_key):
+        return get_api_key
+
+    async def resolve(provider: str) -> str | None:
+        resolved = get_api_key(provider)
+        if inspect.isawaitable(resolved):
+            return await resolved
+        return resolved
+
+    return resolve
+
+
+def _merge_deltas(event: AssistantMessageEvent, deltas: list[str]) -> AssistantMessageEvent:
+    """Collapse buffered deltas into one event carrying their joined text."""
+    if len(deltas) == 1:
+        return event
+    return event.model_copy(update={"delta": "".join(deltas)})
+
+
 async def _stream_response(
-    system_prompt: str,
+    context: Context,
     messages: list[AgentMessage],
-    tools: list[AgentTool] | None,
     config: AgentLoopConfig,
     signal: AbortSignal | None,
-    convert_to_llm: ConvertToLlmFn,
-    transform_context: TransformContextFn | None,
-    get_api_key: GetApiKeyFn | None,
-) -> tuple[AssistantMessage, list[AgentEvent]]:
-    """Stream assistant response using pipy-ai."""
-    events: list[AgentEvent] = []
-
-    # Transform context if configured
-    ctx_messages = messages
-    if transform_context:
-        ctx_messages = await transform_context(messages, signal)
-
-    # Convert to LLM messages
-    llm_messages = convert_to_llm(ctx_messages)
-
-    # Build pipy-ai context
-    context = Context(
-        system_prompt=system_prompt,
-        messages=llm_messages,
-        tools=[t.to_tool() for t in (tools or [])],
-    )
+    resolve_api_key: Callable[[str], Awaitable[str | None]] | None,
+) -> AsyncIterator[AgentEvent | AssistantMessage]:
+    """Stream assistant response using pipy-ai.
 
+    The streaming partial and final message are written into ``messages``.
+    Yields AgentEvents as pipy-ai produces them, then the final AssistantMessage.
+    """
     # Resolve API key
     api_key = config.api_key
-    if get_api_key:
-        resolved = get_api_key(config.model.split("/")[0])
-        # Handle both sync and async
-        if hasattr(resolved, "__await__"):
-            resolved = await resolved
+    if resolve_api_key:
+        resolved = await resolve_api_key(config.provider)
         if resolved:
             api_key = resolved
 
@@ -297,6 +385,7 @@ async def _stream_response(
         reasoning=reasoning,
         session_id=config.session_id,
         api_key=api_key,
+        cache_retention=config.cache_retention,
         thinking_budgets=config.thinking_budgets,
         max_retry_delay_ms=config.max_retry_delay_ms or 60000,
     )
@@ -304,60 +393,123 @@ async def _stream_response(
     # Stream from pipy-ai
     partial: AssistantMessage | None = None
     started = False
+    # Deltas arriving within one flush window are merged into a single update
+    buffered: AssistantMessageEvent | None = None
+    buffered_deltas: list[str] = []
+    last_flush_ns = 0
+
+    def take_update() -> MessageUpdateEvent:
+        # Every flush, whatever triggered it, starts a new window
+        nonlocal buffered, last_flush_ns
+        last_flush_ns = time.monotonic_ns()
+        update = MessageUpdateEvent(
+            message=partial,
+            assistant_event=_merge_deltas(buffered, buffered_deltas),
+        )
+        buffered = None
+        buffered_deltas.clear()
+        return update
+
+    # Abort cancels this task once while it waits on the provider, so a stalled
+    # stream is interrupted at once and deltas need no per-event signal poll.
+    # That one cancel is always matched by uncancel() after the read, however
+    # the provider surfaced it. An abort that lands while a yielded event is
+    # being handled is picked up before the next provider read.
+    task = asyncio.current_task()
+    reading = False
+    abort_requested = False
+    cancel_sent = False
+
+    def on_abort() -> None:
+        nonlocal abort_requested, cancel_sent
+        abort_requested = True
+        if reading and not cancel_sent:
+            cancel_sent = True
+            task.cancel()
+
+    unsubscribe = signal.on_abort(on_abort) if signal else None
+    stream = astream(config.model, context, options)
 
     try:
-        async for event in astream(config.model, context, options):
-            if signal and signal.aborted:
+        while True:
+            if abort_requested:
+                raise AbortError("Aborted")
+            read_failed = False
+            reading = True
+            try:
+                event = await anext(stream)
+            except StopAsyncIteration:
+                break
+            except BaseException:
+                if not abort_requested:
+                    raise
+                # The provider may re-raise the cancel or convert it into its
+                # own error; either way the abort ends the stream
+                read_failed = True
+            finally:
+                reading = False
+                if cancel_sent:
+                    task.uncancel()
+            if read_failed:
+                if task.cancelling():
+                    raise asyncio.CancelledError  # Also cancelled from outside
                 raise AbortError("Aborted")
 
-            if event.type == "start":
+            kind = event.type
+            if kind in _DELTA_EVENT_TYPES:
+                if partial:
+                    partial = event.partial
+                    messages[-1] = partial
+                    if buffered and (
+                        buffered.type != kind or buffered.content_index != event.content_index
+                    ):
+                        yield take_update()
+                    buffered = event
+                    buffered_deltas.append(event.delta)
+                    if time.monotonic_ns() - last_flush_ns >= _UPDATE_FLUSH_INTERVAL_NS:
+                        yield take_update()
+                continue
+
+            if buffered:
+                yield take_update()
+
+            if kind == "start":
                 partial = event.partial
                 messages.append(partial)
                 started = True
-                events.append(MessageStartEvent(message=partial))
-
-            elif event.type in (
-                "text_delta",
-                "thinking_delta",
-                "toolcall_delta",
-                "text_start",
-                "text_end",
-                "thinking_start",
-                "thinking_end",
-                "toolcall_start",
-                "toolcall_end",
-            ):
+                yield MessageStartEvent(message=partial)
+
+            elif kind in _BLOCK_EVENT_TYPES:
                 if partial:
                     partial = event.partial
                     messages[-1] = partial
-                    events.append(
-                        MessageUpdateEvent(
-                            message=partial,
-                            assistant_event=event,
-                        )
-                    )
+                    yield MessageUpdateEvent(message=partial, assistant_event=event)
 
-            elif event.type == "done":
+            elif kind == "done":
                 final = event.message
                 if started:
                     messages[-1] = final
                 else:
                     messages.append(final)
-                    events.append(MessageStartEvent(message=final))
-                events.append(MessageEndEvent(message=final))
-                return final, events
+                    yield MessageStartEvent(message=final)
+                yield MessageEndEvent(message=final)
+                yield final
+                return
 
-            elif event.type == "error":
+            elif kind == "error":
                 final = event.error
                 if started:
                     messages[-1] = final
                 else:
                     messages.append(final)
-                    events.append(MessageStartEvent(message=final))
-                events.append(MessageEndEvent(message=final))
-                return final, events
+                    yield MessageStartEvent(message=final)
+                yield MessageEndEvent(message=final)
+                yield final
+                return
 
     except AbortError:
+        if buffered:
+            yield take_update()
         # Create aborted message
         final = AssistantMessage(
             content=[TextContent(text="Aborted")],
@@ -367,91 +519,116 @@ async def _stream_response(
             messages[-1] = final
         else:
             messages.append(final)
-            events.append(MessageStartEvent(message=final))
-        events.append(MessageEndEvent(message=final))
-        return final, events
+            yield MessageStartEvent(message=final)
+        yield MessageEndEvent(message=final)
+        yield final
+        return
 
-    raise RuntimeError("Stream ended unexpectedly")
-
-
-async def _execute_tools(
-    tools: list[AgentTool] | None,
-    assistant_msg: AssistantMessage,
-    signal: AbortSignal | None,
-    get_steering: GetMessagesFn | None,
-) -> AsyncIterator[AgentEvent | ToolResultMessage | list[AgentMessage]]:
-    """Execute tool calls."""
-    tool_calls = [c for c in assistant_msg.content if isinstance(c, ToolCall)]
+    finally:
+        if unsubscribe:
+            unsubscribe()
+        await stream.aclose()
 
-    for i, tc in enumerate(tool_calls):
-        tool = next((t for t in (tools or []) if t.name == tc.name), None)
+    raise RuntimeError("Stream ended unexpectedly")
 
-        yield ToolExecutionStartEvent(
-            tool_call_id=tc.id,
-            tool_name=tc.name,
-            args=tc.arguments,
-        )
 
-        result: AgentToolResult
-        is_error = False
+async def _run_tool(
+    tool: AgentTool | None, tc: ToolCall, signal: AbortSignal | None
+) -> tuple[AgentToolResult, bool]:
+    """Run one tool call, returning its result and whether it failed."""
+    try:
+        if not tool:
+            raise ValueError(f"Tool not found: {tc.name}")
 
-        try:
-            if not tool:
-                raise ValueError(f"Tool not found: {tc.name}")
+        def on_update(partial: AgentToolResult):
+            pass  # Could queue for yielding
 
-            def on_update(partial: AgentToolResult):
-                pass  # Could queue for yielding
+        return await tool.execute(tc.id, tc.arguments, signal, on_update), False
 
-            result = await tool.execute(tc.id, tc.arguments, signal, on_update)
+    except Exception as e:
+        return AgentToolResult(content=[TextContent(text=str(e))]), True
 
-        except Exception as e:
-            result = AgentToolResult(content=[TextContent(text=str(e))])
-            is_error = True
 
-        yield ToolExecutionEndEvent(
+def _tool_result_events(
+    tc: ToolCall, result: AgentToolResult, is_error: bool
+) -> list[AgentEvent | ToolResultMessage]:
+    """Events closing one tool call, followed by its ToolResultMessage."""
+    tool_result = ToolResultMessage(
+        tool_call_id=tc.id,
+        tool_name=tc.name,
+        content=result.content,
+        is_error=is_error,
+    )
+    return [
+        ToolExecutionEndEvent(
             tool_call_id=tc.id,
             tool_name=tc.name,
             result=result,
             is_error=is_error,
-        )
+        ),
+        MessageStartEvent(message=tool_result),
+        MessageEndEvent(message=tool_result),
+        tool_result,
+    ]
 
-        tool_result = ToolResultMessage(
-            tool_call_id=tc.id,
-            tool_name=tc.name,
-            content=result.content,
-            is_error=is_error,
-        )
 
-        yield MessageStartEvent(message=tool_result)
-        yield MessageEndEvent(message=tool_result)
-        yield tool_result
+async def _execute_tools(
+    tool_index: dict[str, AgentTool],
+    tool_calls: list[ToolCall],
+    signal: AbortSignal | None,
+    get_steering: GetMessagesFn | None,
+    has_queued: Callable[[], bool],
+) -> AsyncIterator[AgentEvent | ToolResultMessage | list[AgentMessage]]:
+    """Execute the tool calls of one assistant message.
+
+    Consecutive calls to concurrent tools run together as one batch; all
+    other calls run one at a time. Results are reported in call order.
+    """
+    i = 0
+    while i < len(tool_calls):
+        tool = tool_index.get(tool_calls[i].name)
+        end = i + 1
+        if tool and tool.concurrent:
+            while end < len(tool_calls):
+                next_tool = tool_index.get(tool_calls[end].name)
+                if not (next_tool and next_tool.concurrent):
+                    break
+                end += 1
+        batch = tool_calls[i:end]
+
+        for tc in batch:
+            yield ToolExecutionStartEvent(
+                tool_call_id=tc.id,
+                tool_name=tc.name,
+                args=tc.arguments,
+            )
+
+        if len(batch) == 1:
+            outcomes = [await _run_tool(tool, batch[0], signal)]
+        else:
+            outcomes = await asyncio.gather(
+                *(_run_tool(tool_index[tc.name], tc, signal) for tc in batch)
+            )
+
+        for tc, (result, is_error) in zip(batch, outcomes, strict=True):
+            for item in _tool_result_events(tc, result, is_error):
+                yield item
+
+        i = end
 
         # Check steering
-        if get_steering:
+        if get_steering and has_queued():
             steering = await get_steering()
             if steering:
                 yield steering
                 # Skip remaining
-                for skip in tool_calls[i + 1 :]:
+                for skip in tool_calls[i:]:
                     yield ToolExecutionStartEvent(
                         tool_call_id=skip.id,
                         tool_name=skip.name,
                         args=skip.arguments,
                     )
                     skip_result = AgentToolResult(content=[TextContent(text="Skipped")])
-                    yield ToolExecutionEndEvent(
-                        tool_call_id=skip.id,
-                        tool_name=skip.name,
-                        result=skip_result,
-                        is_error=True,
-                    )
-                    skip_msg = ToolResultMessage(
-                        tool_call_id=skip.id,
-                        tool_name=skip.name,
-                        content=skip_result.content,
-                        is_error=True,
-                    )
-                    yield MessageStartEvent(message=skip_msg)
-                    yield MessageEndEvent(message=skip_msg)
-                    yield skip_msg
+                    for item in _tool_result_events(skip, skip_result, True):
+                        yield item
                 break
@@ -1,7 +1,9 @@
 """Agent-specific types. LLM types imported from pipy-ai."""
 
-from typing import Any, Callable, Awaitable, TypeVar, Generic
-from pydantic import BaseModel, Field, ConfigDict
+from dataclasses import dataclass
+from typing import Annotated, Any, Callable, Awaitable, Literal, TypeVar, Generic
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr, TypeAdapter
+from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 # Import ALL LLM types from pipy-ai (no redefinition!)
 # Note: Many imports are for re-export via __init__.py, not used directly here
@@ -26,6 +28,7 @@ from pipy_ai import (  # noqa: F401
     AssistantMessageEvent,
     SimpleStreamOptions,
     # Options
+    CacheRetention,
     ThinkingBudgets,
     # Cancellation
     AbortSignal,
@@ -42,7 +45,8 @@ T = TypeVar("T")
 class AgentToolResult(BaseModel, Generic[T]):
     """Result from tool execution."""
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    # Results are final once returned; parametrized variants are cached by pydantic
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True, defer_build=True)
 
     content: list[TextContent | ImageContent] = Field(default_factory=list)
     details: T | None = None
@@ -57,6 +61,7 @@ class AgentTool(BaseModel):
 
     Extends pipy-ai's Tool concept with:
     - label: Human-readable name for UI
+    - concurrent: Safe to run alongside other concurrent calls
     - execute: Async function to run the tool
     """
 
@@ -66,6 +71,11 @@ class AgentTool(BaseModel):
     description: str
     parameters: dict[str, Any]  # JSON Schema
     label: str = ""  # UI display name
+    concurrent: bool = False  # Independent of other calls (e.g. read-only)
+
+    # Converted Tool and the (name, description, parameters) it was built from
+    _tool: Tool | None = PrivateAttr(default=None)
+    _tool_source: tuple[Any, ...] | None = PrivateAttr(default=None)
 
     async def execute(
         self,
@@ -78,12 +88,20 @@ class AgentTool(BaseModel):
         raise NotImplementedError(f"Tool {self.name} has no execute implementation")
 
     def to_tool(self) -> Tool:
-        """Convert to pipy-ai Tool for LLM calls."""
-        return Tool(
-            name=self.name,
-            description=self.description,
-            parameters=self.parameters,
-        )
+        """Convert to pipy-ai Tool for LLM calls.
+
+        The Tool is built once and reused until name, description or
+        parameters are replaced.
+        """
+        source = (self.name, self.description, self.parameters)
+        if self._tool is None or self._tool_source != source:
+            self._tool = Tool(
+                name=self.name,
+                description=self.description,
+                parameters=self.parameters,
+            )
+            self._tool_source = source
+        return self._tool
 
 
 def tool(
@@ -91,6 +109,7 @@ def tool(
     description: str,
     parameters: dict[str, Any],
     label: str = "",
+    concurrent: bool = False,
 ) -> Callable[[Callable], AgentTool]:
     """Decorator to create an AgentTool from an async function.
 
@@ -114,26 +133,34 @@ def tool(
     """
 
     def decorator(fn: Callable) -> AgentTool:
-        class DecoratedTool(AgentTool):
-            async def execute(
-                self,
-                tool_call_id: str,
-                params: dict[str, Any],
-                signal: AbortSignal | None = None,
-                on_update: AgentToolUpdateCallback | None = None,
-            ) -> AgentToolResult:
-                return await fn(tool_call_id, params, signal, on_update)
-
-        return DecoratedTool(
+        t = _FunctionTool(
             name=name,
             description=description,
             parameters=parameters,
             label=label or name,
+            concurrent=concurrent,
         )
+        t._fn = fn
+        return t
 
     return decorator
 
 
+class _FunctionTool(AgentTool):
+    """AgentTool delegating to a function; one class shared by every @tool."""
+
+    _fn: Callable = PrivateAttr()
+
+    async def execute(
+        self,
+        tool_call_id: str,
+        params: dict[str, Any],
+        signal: AbortSignal | None = None,
+        on_update: AgentToolUpdateCallback | None = None,
+    ) -> AgentToolResult:
+        return await self._fn(tool_call_id, params, signal, on_update)
+
+
 # === Agent Message ===
 
 # AgentMessage = LLM messages + custom app messages
@@ -155,7 +182,7 @@ AgentMessage = Message
 class AgentState(BaseModel):
     """Current state of the agent."""
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    model_config = ConfigDict(arbitrary_types_allowed=True, defer_build=True)
 
     system_prompt: str = ""
     model: str = ""  # Model identifier (e.g., "anthropic/claude-sonnet-4-5")
@@ -169,89 +196,109 @@ class AgentState(BaseModel):
 
 
 # === Agent Events ===
+#
+# Events emitted many times per turn (turn/message starts and ends, streaming
+# and tool progress updates) are slotted dataclasses: they are built in-process
+# from already-validated parts, so pydantic validation would only add cost.
+# The remaining events are validated pydantic dataclasses, also slotted; they
+# are immutable once emitted and their schemas are built on first use rather
+# than at import.
+
+_validated_event = pydantic_dataclass(
+    slots=True, frozen=True, kw_only=True, config=ConfigDict(defer_build=True)
+)
 
 
-class AgentStartEvent(BaseModel):
+@_validated_event
+class AgentStartEvent:
     """Agent execution started."""
 
-    type: str = "agent_start"
+    type: Literal["agent_start"] = "agent_start"
 
 
-class AgentEndEvent(BaseModel):
+@_validated_event
+class AgentEndEvent:
     """Agent execution ended."""
 
-    type: str = "agent_end"
+    type: Literal["agent_end"] = "agent_end"
     messages: list[AgentMessage] = Field(default_factory=list)
 
 
-class TurnStartEvent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class TurnStartEvent:
     """A turn started (assistant response + tool calls)."""
 
-    type: str = "turn_start"
+    type: Literal["turn_start"] = "turn_start"
 
 
-class TurnEndEvent(BaseModel):
+@_validated_event
+class TurnEndEvent:
     """A turn ended."""
 
-    type: str = "turn_end"
+    type: Literal["turn_end"] = "turn_end"
     message: AssistantMessage
     tool_results: list[ToolResultMessage] = Field(default_factory=list)
 
 
-class MessageStartEvent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class MessageStartEvent:
     """A message started streaming."""
 
-    type: str = "message_start"
+    type: Literal["message_start"] = "message_start"
     message: AgentMessage
 
 
-class MessageUpdateEvent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class MessageUpdateEvent:
     """A message updated during streaming."""
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
-    type: str = "message_update"
+    type: Literal["message_update"] = "message_update"
     message: AssistantMessage
     assistant_event: AssistantMessageEvent  # The underlying pipy-ai event
 
 
-class MessageEndEvent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class MessageEndEvent:
     """A message finished."""
 
-    type: str = "message_end"
+    type: Literal["message_end"] = "message_end"
     message: AgentMessage
 
 
-class ToolExecutionStartEvent(BaseModel):
+@_validated_event
+class ToolExecutionStartEvent:
     """Tool execution started."""
 
-    type: str = "tool_execution_start"
+    type: Literal["tool_execution_start"] = "tool_execution_start"
     tool_call_id: str
     tool_name: str
     args: dict[str, Any] = Field(default_factory=dict)
 
 
-class ToolExecutionUpdateEvent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ToolExecutionUpdateEvent:
     """Tool execution progress update."""
 
-    type: str = "tool_execution_update"
+    type: Literal["tool_execution_update"] = "tool_execution_update"
     tool_call_id: str
     tool_name: str
     partial_result: AgentToolResult | None = None
 
 
-class ToolExecutionEndEvent(BaseModel):
+@_validated_event
+class ToolExecutionEndEvent:
     """Tool execution ended."""
 
-    type: str = "tool_execution_end"
+    type: Literal["tool_execution_end"] = "tool_execution_end"
     tool_call_id: str
     tool_name: str
     result: AgentToolResult | None = None
     is_error: bool = False
 
 
-# Union of all agent events
-AgentEvent = (
+# Union of all agent events, tagged by type so validation picks the member
+# directly instead of trying each one in turn
+AgentEvent = Annotated[
     AgentStartEvent
     | AgentEndEvent
     | TurnStartEvent
@@ -261,7 +308,19 @@ AgentEvent = (
     | MessageEndEvent
     | ToolExecutionStartEvent
     | ToolExecutionUpdateEvent
-    | ToolExecutionEndEvent
+    | ToolExecutionEndEvent,
+    Field(discriminator="type"),
+]
+
+# Shared validators for the unions; building a TypeAdapter is costly, so
+# validate/dump messages and events through these instead of new adapters.
+# For raw JSON, call validate_json on the bytes rather than json.loads first:
+# pydantic-core parses and validates in one pass without intermediate dicts.
+AGENT_MESSAGE_ADAPTER: TypeAdapter[AgentMessage] = TypeAdapter(
+    AgentMessage, config=ConfigDict(defer_build=True)
+)
+AGENT_EVENT_ADAPTER: TypeAdapter[AgentEvent] = TypeAdapter(
+    AgentEvent, config=ConfigDict(defer_build=True)
 )
 
 
@@ -274,7 +333,7 @@ class AgentLoopConfig(BaseModel):
     Inherits stream options from pipy-ai, adds agent-specific callbacks.
     """
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    model_config = ConfigDict(arbitrary_types_allowed=True, defer_build=True)
 
     model: str  # Model identifier
 
@@ -284,6 +343,8 @@ class AgentLoopConfig(BaseModel):
     reasoning: ThinkingLevel | None = None
     session_id: str | None = None
     api_key: str | None = None
+    # Prompt caching is opt-in; SHORT/LONG mark the static prefix for caching
+    cache_retention: CacheRetention = CacheRetention.NONE
 
     # Custom token budgets for thinking levels (token-based providers only)
     thinking_budgets: ThinkingBudgets | None = None
@@ -294,6 +355,11 @@ class AgentLoopConfig(BaseModel):
     # Default: 60000 (60 seconds). Set to 0 to disable the cap.
     max_retry_delay_ms: int | None = None
 
+    @property
+    def provider(self) -> str:
+        """Provider prefix of model, used to resolve API keys."""
+        return self.model.partition("/")[0]
+
 
 # Type aliases for callbacks (set on config instance, not serialized)
 ConvertToLlmFn = Callable[[list[AgentMessage]], list[Message]]
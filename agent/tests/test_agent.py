@@ -1,13 +1,14 @@
 """Tests for Agent class."""
 
 import pytest
+
 from pipy_agent import (
     Agent,
     AgentToolResult,
-    tool,
     TextContent,
-    UserMessage,
     ThinkingLevel,
+    UserMessage,
+    tool,
 )
 
 
@@ -36,6 +37,12 @@ class TestAgentInit:
         assert len(agent.state.tools) == 1
         assert agent.state.tools[0].name == "test"
 
+    def test_uses_slots(self):
+        agent = Agent()
+        assert not hasattr(agent, "__dict__")
+        with pytest.raises(AttributeError):
+            agent._system_prompt = "typo"
+
 
 class TestAgentStateMutators:
     def test_set_system_prompt(self):
@@ -115,6 +122,47 @@ class TestAgentSubscription:
         assert len(events1) == 1
         assert len(events2) == 1
 
+    def test_unsubscribe_during_emit(self):
+        from pipy_agent import AgentStartEvent
+
+        agent = Agent()
+        events = []
+
+        def once(event):
+            events.append(event)
+            unsub()
+
+        unsub = agent.subscribe(once)
+        agent.subscribe(lambda e: None)
+
+        agent._emit(AgentStartEvent())
+        agent._emit(AgentStartEvent())
+        assert len(events) == 1
+
+    def test_listeners_called_in_subscription_order(self):
+        from pipy_agent import AgentStartEvent
+
+        agent = Agent()
+        calls = []
+
+        def record(event):
+            calls.append("twice")
+
+        agent.subscribe(lambda e: calls.append("first"))
+        unsub = agent.subscribe(record)
+        agent.subscribe(record)
+        agent.subscribe(lambda e: calls.append("last"))
+
+        agent._emit(AgentStartEvent())
+        assert calls == ["first", "twice", "twice", "last"]
+
+        # Each subscription is removed independently, and only once
+        unsub()
+        unsub()
+        calls.clear()
+        agent._emit(AgentStartEvent())
+        assert calls == ["first", "twice", "last"]
+
 
 class TestAgentQueues:
     def test_steer(self):
@@ -141,6 +189,35 @@ class TestAgentQueues:
         assert len(agent._steering_queue) == 0
         assert len(agent._follow_up_queue) == 0
 
+    def test_has_queued_messages(self):
+        agent = Agent()
+        assert agent.has_queued_messages() is False
+
+        agent.follow_up(UserMessage(content=[TextContent(text="next")]))
+        assert agent.has_queued_messages() is True
+
+    @pytest.mark.asyncio
+    async def test_steering_one_at_a_time(self):
+        agent = Agent()
+        first = UserMessage(content=[TextContent(text="1")])
+        second = UserMessage(content=[TextContent(text="2")])
+        agent.steer(first)
+        agent.steer(second)
+
+        assert await agent._get_steering() == [first]
+        assert await agent._get_steering() == [second]
+        assert await agent._get_steering() == []
+
+    @pytest.mark.asyncio
+    async def test_follow_up_all_mode(self):
+        agent = Agent(follow_up_mode="all")
+        msgs = [UserMessage(content=[TextContent(text=str(i))]) for i in range(3)]
+        for msg in msgs:
+            agent.follow_up(msg)
+
+        assert await agent._get_follow_up() == msgs
+        assert len(agent._follow_up_queue) == 0
+
 
 class TestAgentControl:
     def test_reset(self):
@@ -151,8 +228,8 @@ class TestAgentControl:
 
         agent.reset()
         assert agent.messages == []
-        assert agent._steering_queue == []
-        assert agent._follow_up_queue == []
+        assert len(agent._steering_queue) == 0
+        assert len(agent._follow_up_queue) == 0
         assert agent.state.error is None
 
     def test_abort_when_not_streaming(self):
@@ -251,3 +328,87 @@ class TestAgentNewOptions:
     def test_max_retry_delay_ms_zero_disables_cap(self):
         agent = Agent(max_retry_delay_ms=0)
         assert agent.max_retry_delay_ms == 0
+
+
+class TestAgentRun:
+    """Run the agent against a mocked pipy-ai stream."""
+
+    @pytest.mark.asyncio
+    async def test_history_not_duplicated(self):
+        from unittest.mock import patch
+
+        from pipy_ai import AssistantMessage, DoneEvent, StartEvent
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="hi")])
+            yield StartEvent(partial=partial)
+            yield DoneEvent(message=partial)
+
+        agent = Agent()
+        agent.append_message(UserMessage(content=[TextContent(text="earlier")]))
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            await agent.prompt("hello")
+
+        assert [m.role for m in agent.messages] == ["user", "user", "assistant"]
+        assert agent.state.error is None
+
+    @pytest.mark.asyncio
+    async def test_listener_added_mid_run_sees_later_events(self):
+        from unittest.mock import patch
+
+        from pipy_ai import AssistantMessage, DoneEvent, StartEvent
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="hi")])
+            yield StartEvent(partial=partial)
+            yield DoneEvent(message=partial)
+
+        agent = Agent()
+        late = []
+
+        def on_event(event):
+            if event.type == "turn_start" and not late:
+                agent.subscribe(lambda e: late.append(e.type))
+
+        agent.subscribe(on_event)
+        with patch("pipy_agent.loop.astream", mock_stream):
+            await agent.prompt("hello")
+
+        assert late[0] == "message_start"
+        assert late[-1] == "agent_end"
+
+
+class TestAgentStateUpdates:
+    def test_tool_execution_tracks_pending_calls(self):
+        from pipy_agent import ToolExecutionEndEvent, ToolExecutionStartEvent
+
+        agent = Agent()
+        agent._update_state(ToolExecutionStartEvent(tool_call_id="c1", tool_name="t"))
+        assert agent.state.pending_tool_calls == {"c1"}
+
+        agent._update_state(ToolExecutionEndEvent(tool_call_id="c1", tool_name="t"))
+        assert agent.state.pending_tool_calls == set()
+
+    def test_message_events_update_stream_message_and_history(self):
+        from pipy_agent import AssistantMessage, MessageEndEvent, MessageStartEvent
+
+        agent = Agent()
+        user = UserMessage(content=[TextContent(text="hi")])
+        agent._update_state(MessageStartEvent(message=user))
+        assert agent.state.stream_message is None
+
+        reply = AssistantMessage(content=[TextContent(text="hello")])
+        agent._update_state(MessageStartEvent(message=reply))
+        assert agent.state.stream_message is reply
+
+        agent._update_state(MessageEndEvent(message=reply))
+        assert agent.state.stream_message is None
+        assert agent.messages == [reply]
+
+    def test_unhandled_event_is_ignored(self):
+        from pipy_agent import TurnStartEvent
+
+        agent = Agent()
+        agent._update_state(TurnStartEvent())
+        assert agent.messages == []
@@ -6,10 +6,14 @@ Requires OPENAI_API_KEY environment variable.
 
 import os
 import pytest
-from dotenv import load_dotenv
 
-# Load from animus .env for API keys
-load_dotenv("C:/Users/donal/animus/.env")
+# Load from animus .env for API keys; dotenv is only imported when the key is
+# missing and the file exists, so runs that end up skipped pay nothing for it
+ENV_PATH = "C:/Users/donal/animus/.env"
+if not os.getenv("OPENAI_API_KEY") and os.path.exists(ENV_PATH):
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_PATH)
 
 
 # Skip all tests if no API key
@@ -19,21 +23,35 @@ pytestmark = pytest.mark.skipif(
 )
 
 
+@pytest.fixture(scope="module")
+def shared_agent():
+    """One Agent for the module; the agent fixture resets it between tests."""
+    from pipy_agent import Agent
+
+    return Agent(model="openai/gpt-4o-mini")
+
+
+@pytest.fixture
+def agent(shared_agent):
+    yield shared_agent
+    shared_agent.reset()
+    shared_agent.set_system_prompt("")
+    shared_agent.set_tools([])
+
+
 class TestLiveAgent:
     """Live tests with real LLM."""
 
     @pytest.mark.asyncio
-    async def test_simple_prompt(self):
+    async def test_simple_prompt(self, agent):
         """Test simple prompt without tools."""
-        from pipy_agent import Agent
-
-        agent = Agent(model="openai/gpt-4o-mini")
         agent.set_system_prompt("You are a helpful assistant. Be very brief.")
 
         events = []
-        agent.subscribe(lambda e: events.append(e))
+        unsubscribe = agent.subscribe(lambda e: events.append(e))
 
         await agent.prompt("Say 'hello' and nothing else.")
+        unsubscribe()
 
         # Check we got expected events
         event_types = [e.type for e in events]
@@ -50,9 +68,9 @@ class TestLiveAgent:
         assert "hello" in assistant_msg.text.lower()
 
     @pytest.mark.asyncio
-    async def test_with_tool(self):
+    async def test_with_tool(self, agent):
         """Test agent with tool execution."""
-        from pipy_agent import Agent, tool, AgentToolResult, TextContent
+        from pipy_agent import tool, AgentToolResult, TextContent
 
         @tool(
             name="get_time",
@@ -65,14 +83,14 @@ class TestLiveAgent:
                 details={"hour": 15, "minute": 14},
             )
 
-        agent = Agent(model="openai/gpt-4o-mini")
         agent.set_system_prompt("You are helpful. Use tools when appropriate.")
         agent.set_tools([get_time])
 
         events = []
-        agent.subscribe(lambda e: events.append(e))
+        unsubscribe = agent.subscribe(lambda e: events.append(e))
 
         await agent.prompt("What time is it?")
+        unsubscribe()
 
         event_types = [e.type for e in events]
 
@@ -88,12 +106,8 @@ class TestLiveAgent:
         assert "3:14" in final_text or "3" in final_text
 
     @pytest.mark.asyncio
-    async def test_streaming_events(self):
+    async def test_streaming_events(self, agent):
         """Test that streaming events are emitted."""
-        from pipy_agent import Agent
-
-        agent = Agent(model="openai/gpt-4o-mini")
-
         update_count = 0
         event_types = set()
 
@@ -103,9 +117,10 @@ class TestLiveAgent:
             if event.type == "message_update":
                 update_count += 1
 
-        agent.subscribe(on_event)
+        unsubscribe = agent.subscribe(on_event)
 
         await agent.prompt("Write a haiku about programming.")
+        unsubscribe()
 
         # Should have message_update events (streaming)
         assert "message_update" in event_types
@@ -1,13 +1,14 @@
 """Tests for agent loop."""
 
 import pytest
+
 from pipy_agent import (
-    default_convert_to_llm,
     AgentLoopConfig,
-    UserMessage,
     AssistantMessage,
-    ToolResultMessage,
     TextContent,
+    ToolResultMessage,
+    UserMessage,
+    default_convert_to_llm,
 )
 from pipy_agent.loop import agent_loop, agent_loop_continue
 
@@ -53,6 +54,32 @@ class TestDefaultConvertToLlm:
         result = default_convert_to_llm(messages)
         assert len(result) == 2
 
+    def test_returns_same_list_when_nothing_filtered(self):
+        messages = [
+            UserMessage(content=[TextContent(text="hello")]),
+            AssistantMessage(content=[TextContent(text="hi")]),
+        ]
+        assert default_convert_to_llm(messages) is messages
+
+    def test_filters_after_first_unknown_role(self):
+        from pydantic import BaseModel
+
+        class CustomMessage(BaseModel):
+            role: str = "custom"
+
+        user = UserMessage(content=[TextContent(text="hello")])
+        assistant = AssistantMessage(content=[TextContent(text="hi")])
+        messages = [user, CustomMessage(), assistant, CustomMessage(), user]
+        assert default_convert_to_llm(messages) == [user, assistant, user]
+
+    def test_keeps_subclasses_by_role(self):
+        class NoteMessage(UserMessage):
+            pass
+
+        note = NoteMessage(content=[TextContent(text="note")])
+        messages = [UserMessage(content=[TextContent(text="hello")]), note]
+        assert default_convert_to_llm(messages) is messages
+
 
 class TestAgentLoopConfig:
     def test_model_required(self):
@@ -68,6 +95,43 @@ class TestAgentLoopConfig:
         assert config.temperature == 0.5
         assert config.max_tokens == 1000
 
+    def test_provider_derived_from_model(self):
+        assert AgentLoopConfig(model="anthropic/claude-sonnet-4-5").provider == "anthropic"
+        assert AgentLoopConfig(model="gpt-4o").provider == "gpt-4o"
+
+    def test_provider_follows_model_changes(self):
+        config = AgentLoopConfig(model="anthropic/claude-sonnet-4-5")
+        config.model = "openai/gpt-4o"
+        assert config.provider == "openai"
+
+    @pytest.mark.asyncio
+    async def test_cache_retention_is_opt_in(self):
+        from unittest.mock import patch
+
+        from pipy_agent import CacheRetention
+
+        seen = []
+        scripted = _scripted_stream(
+            AssistantMessage(content=[TextContent(text="a")]),
+            AssistantMessage(content=[TextContent(text="b")]),
+        )
+
+        async def mock_stream(model, context, options):
+            seen.append(options.cache_retention)
+            async for event in scripted(model, context, options):
+                yield event
+
+        prompts = [UserMessage(content=[TextContent(text="hi")])]
+        with patch("pipy_agent.loop.astream", mock_stream):
+            for config in (
+                AgentLoopConfig(model="test/model"),
+                AgentLoopConfig(model="test/model", cache_retention=CacheRetention.SHORT),
+            ):
+                async for _ in agent_loop(prompts, config=config):
+                    pass
+
+        assert seen == [CacheRetention.NONE, CacheRetention.SHORT]
+
 
 class TestAgentLoopValidation:
     @pytest.mark.asyncio
@@ -160,3 +224,653 @@ class TestConvertToLlmCallback:
 
         # custom_convert should have been called
         assert len(called_with) > 0
+
+
+class TestDeltaCoalescing:
+    """Rapid streaming deltas are merged into fewer MessageUpdateEvents."""
+
+    @pytest.mark.asyncio
+    async def test_fast_deltas_are_merged_without_losing_text(self):
+        from unittest.mock import patch
+
+        from pipy_ai import DoneEvent, StartEvent, TextDeltaEvent, TextEndEvent, TextStartEvent
+
+        chunks = [f"w{i} " for i in range(50)]
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="")])
+            yield StartEvent(partial=partial)
+            yield TextStartEvent(partial=partial)
+            for chunk in chunks:
+                partial.content[0].text += chunk
+                yield TextDeltaEvent(delta=chunk, partial=partial)
+            yield TextEndEvent(content="".join(chunks), partial=partial)
+            yield DoneEvent(message=partial)
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        deltas = []
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for event in agent_loop(prompts, config=config):
+                if event.type == "message_update":
+                    if event.assistant_event.type == "text_delta":
+                        deltas.append(event.assistant_event.delta)
+
+        assert len(deltas) < len(chunks)
+        assert "".join(deltas) == "".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_any_flush_starts_a_new_window(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_ai import DoneEvent, StartEvent, TextDeltaEvent, ThinkingDeltaEvent
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="")])
+            yield StartEvent(partial=partial)
+            yield ThinkingDeltaEvent(delta="x", partial=partial)
+            yield ThinkingDeltaEvent(delta="y", partial=partial)
+            await asyncio.sleep(0.02)  # Longer than the flush window
+            # The switch to text flushes "y"; "a" and "b" share the new window
+            yield TextDeltaEvent(delta="a", partial=partial)
+            yield TextDeltaEvent(delta="b", partial=partial)
+            yield DoneEvent(message=partial)
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        updates = []
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for event in agent_loop(prompts, config=config):
+                if event.type == "message_update":
+                    updates.append((event.assistant_event.type, event.assistant_event.delta))
+
+        assert updates == [
+            ("thinking_delta", "x"),
+            ("thinking_delta", "y"),
+            ("text_delta", "ab"),
+        ]
+
+
+class TestIncrementalStreaming:
+    @pytest.mark.asyncio
+    async def test_updates_reach_consumer_before_stream_finishes(self):
+        from unittest.mock import patch
+
+        from pipy_ai import DoneEvent, StartEvent, TextDeltaEvent
+
+        seen: list[str] = []
+        seen_before_done: list[str] = []
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="hi")])
+            yield StartEvent(partial=partial)
+            yield TextDeltaEvent(delta="hi", partial=partial)
+            seen_before_done.extend(seen)
+            yield DoneEvent(message=partial)
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for event in agent_loop(prompts, config=config):
+                seen.append(event.type)
+
+        assert "message_update" in seen_before_done
+        assert seen[-1] == "agent_end"
+
+
+def _scripted_stream(*responses):
+    """Mock astream that answers each call with the next scripted AssistantMessage."""
+    from pipy_ai import DoneEvent, StartEvent
+
+    remaining = list(responses)
+
+    async def mock_stream(*args, **kwargs):
+        message = remaining.pop(0)
+        yield StartEvent(partial=message)
+        yield DoneEvent(message=message)
+
+    return mock_stream
+
+
+class TestToolExecution:
+    @pytest.mark.asyncio
+    async def test_tool_call_dispatched_by_name(self):
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        calls = []
+
+        def make_tool(name):
+            @tool(name=name, description=name, parameters={})
+            async def _tool(tool_call_id, params, signal, on_update):
+                calls.append(name)
+                return AgentToolResult(content=[TextContent(text=f"{name} done")])
+
+            return _tool
+
+        tools = [make_tool(f"tool_{i}") for i in range(5)]
+        first = AssistantMessage(
+            content=[ToolCall(id="c1", name="tool_3", arguments={})],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="finished")])
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", _scripted_stream(first, second)):
+            async for event in agent_loop(prompts, tools=tools, config=config):
+                events.append(event)
+
+        assert calls == ["tool_3"]
+        end = next(e for e in events if e.type == "tool_execution_end")
+        assert end.is_error is False
+        assert end.result.content[0].text == "tool_3 done"
+        assert events[-1].type == "agent_end"
+
+    @pytest.mark.asyncio
+    async def test_unknown_tool_reports_error(self):
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        @tool(name="other", description="other", parameters={})
+        async def other(tool_call_id, params, signal, on_update):
+            return AgentToolResult()
+
+        first = AssistantMessage(
+            content=[ToolCall(id="c1", name="missing", arguments={})],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="ok")])
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", _scripted_stream(first, second)):
+            async for event in agent_loop(prompts, tools=[other], config=config):
+                events.append(event)
+
+        end = next(e for e in events if e.type == "tool_execution_end")
+        assert end.is_error is True
+        assert "Tool not found" in end.result.content[0].text
+
+    @pytest.mark.asyncio
+    async def test_steering_after_tools_is_delivered_once(self):
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        @tool(name="work", description="work", parameters={})
+        async def work(tool_call_id, params, signal, on_update):
+            return AgentToolResult()
+
+        steer = UserMessage(content=[TextContent(text="change of plan")])
+        queue = [steer]
+
+        async def get_steering():
+            # Deliver the steering message only after the tool has run
+            if any(e.type == "tool_execution_end" for e in events) and queue:
+                return [queue.pop()]
+            return []
+
+        first = AssistantMessage(
+            content=[ToolCall(id="c1", name="work", arguments={})],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="ok")])
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", _scripted_stream(first, second)):
+            async for event in agent_loop(
+                prompts, tools=[work], config=config, get_steering_messages=get_steering
+            ):
+                events.append(event)
+
+        end = events[-1]
+        assert end.type == "agent_end"
+        assert sum(1 for m in end.messages if m is steer) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tools_run_together(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        running = 0
+        peak = 0
+        log = []
+
+        @tool(name="fetch", description="fetch", parameters={}, concurrent=True)
+        async def fetch(tool_call_id, params, signal, on_update):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 if tool_call_id == "c1" else 0)
+            running -= 1
+            log.append(tool_call_id)
+            return AgentToolResult(content=[TextContent(text=tool_call_id)])
+
+        @tool(name="write", description="write", parameters={})
+        async def write(tool_call_id, params, signal, on_update):
+            assert running == 0
+            log.append(tool_call_id)
+            return AgentToolResult(content=[TextContent(text=tool_call_id)])
+
+        first = AssistantMessage(
+            content=[
+                ToolCall(id="c1", name="fetch", arguments={}),
+                ToolCall(id="c2", name="fetch", arguments={}),
+                ToolCall(id="c3", name="write", arguments={}),
+                ToolCall(id="c4", name="fetch", arguments={}),
+            ],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="ok")])
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", _scripted_stream(first, second)):
+            async for event in agent_loop(prompts, tools=[fetch, write], config=config):
+                events.append(event)
+
+        assert peak == 2
+        assert log == ["c2", "c1", "c3", "c4"]
+        tool_events = [
+            (e.type, e.tool_call_id) for e in events if e.type.startswith("tool_execution")
+        ]
+        assert tool_events == [
+            ("tool_execution_start", "c1"),
+            ("tool_execution_start", "c2"),
+            ("tool_execution_end", "c1"),
+            ("tool_execution_end", "c2"),
+            ("tool_execution_start", "c3"),
+            ("tool_execution_end", "c3"),
+            ("tool_execution_start", "c4"),
+            ("tool_execution_end", "c4"),
+        ]
+        results = [m.tool_call_id for m in events[-1].messages if m.role == "toolResult"]
+        assert results == ["c1", "c2", "c3", "c4"]
+
+
+class TestGetApiKey:
+    async def _run_with(self, get_api_key):
+        from unittest.mock import patch
+
+        seen = []
+        message = AssistantMessage(content=[TextContent(text="ok")])
+        scripted = _scripted_stream(message)
+
+        async def mock_stream(model, context, options):
+            seen.append(options.api_key)
+            async for event in scripted(model, context, options):
+                yield event
+
+        config = AgentLoopConfig(model="openai/gpt-4o")
+        prompts = [UserMessage(content=[TextContent(text="hi")])]
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for _ in agent_loop(prompts, config=config, get_api_key=get_api_key):
+                pass
+        return seen
+
+    @pytest.mark.asyncio
+    async def test_sync_resolver(self):
+        assert await self._run_with(lambda provider: f"{provider}-key") == ["openai-key"]
+
+    @pytest.mark.asyncio
+    async def test_async_resolver(self):
+        async def get_key(provider):
+            return f"{provider}-async"
+
+        assert await self._run_with(get_key) == ["openai-async"]
+
+    @pytest.mark.asyncio
+    async def test_sync_callable_returning_awaitable(self):
+        async def get_key(provider):
+            return "deferred"
+
+        assert await self._run_with(lambda provider: get_key(provider)) == ["deferred"]
+
+
+class TestLlmContext:
+    @pytest.mark.asyncio
+    async def test_later_turns_send_full_history(self):
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        @tool(name="work", description="work", parameters={})
+        async def work(tool_call_id, params, signal, on_update):
+            return AgentToolResult(content=[TextContent(text="done")])
+
+        first = AssistantMessage(
+            content=[ToolCall(id="c1", name="work", arguments={})],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="ok")])
+        scripted = _scripted_stream(first, second)
+        sent = []
+
+        async def mock_stream(model, context, options):
+            sent.append([m.role for m in context.messages])
+            async for event in scripted(model, context, options):
+                yield event
+
+        config = AgentLoopConfig(model="test/model")
+        history = [UserMessage(content=[TextContent(text="earlier")])]
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for _ in agent_loop(prompts, messages=history, tools=[work], config=config):
+                pass
+
+        assert sent == [
+            ["user", "user"],
+            ["user", "user", "assistant", "toolResult"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_context_reused_across_turns(self):
+        from unittest.mock import patch
+
+        from pipy_agent import AgentToolResult, ToolCall, tool
+
+        @tool(name="work", description="work", parameters={})
+        async def work(tool_call_id, params, signal, on_update):
+            return AgentToolResult(content=[TextContent(text="done")])
+
+        first = AssistantMessage(
+            content=[ToolCall(id="c1", name="work", arguments={})],
+            stop_reason="toolUse",
+        )
+        second = AssistantMessage(content=[TextContent(text="ok")])
+        scripted = _scripted_stream(first, second)
+        contexts = []
+
+        async def mock_stream(model, context, options):
+            contexts.append((context, len(context.messages)))
+            async for event in scripted(model, context, options):
+                yield event
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for _ in agent_loop(
+                prompts, system_prompt="sys", tools=[work], config=config
+            ):
+                pass
+
+        (ctx1, len1), (ctx2, len2) = contexts
+        assert ctx1 is ctx2
+        assert (len1, len2) == (1, 3)
+        assert ctx2.system_prompt == "sys"
+        assert [t.name for t in ctx2.tools] == ["work"]
+
+
+class TestPendingMessages:
+    @pytest.mark.asyncio
+    async def test_batched_steering_added_in_order(self):
+        from unittest.mock import patch
+
+        steering = [UserMessage(content=[TextContent(text=str(i))]) for i in range(3)]
+        batches = [steering]
+
+        async def get_steering():
+            return batches.pop() if batches else []
+
+        reply = AssistantMessage(content=[TextContent(text="ok")])
+        sent = []
+        scripted = _scripted_stream(reply)
+
+        async def mock_stream(model, context, options):
+            sent.append(list(context.messages))
+            async for event in scripted(model, context, options):
+                yield event
+
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for event in agent_loop(
+                prompts, config=config, get_steering_messages=get_steering
+            ):
+                events.append(event)
+
+        assert sent[0] == prompts + steering
+        ended = [e.message for e in events if e.type == "message_end"]
+        assert ended == prompts + steering + [reply]
+        assert events[-1].messages == prompts + steering + [reply]
+
+    @pytest.mark.asyncio
+    async def test_callbacks_skipped_when_nothing_queued(self):
+        from unittest.mock import patch
+
+        calls = []
+
+        async def get_steering():
+            calls.append("steering")
+            return []
+
+        async def get_follow_up():
+            calls.append("follow_up")
+            return []
+
+        reply = AssistantMessage(content=[TextContent(text="ok")])
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="go")])]
+
+        with patch("pipy_agent.loop.astream", _scripted_stream(reply)):
+            async for _ in agent_loop(
+                prompts,
+                config=config,
+                get_steering_messages=get_steering,
+                get_follow_up_messages=get_follow_up,
+                has_queued_messages=lambda: False,
+            ):
+                pass
+
+        assert calls == []
+
+
+class TestChatOnly:
+    @pytest.mark.asyncio
+    async def test_stray_tool_call_without_tools_gets_error_result(self):
+        from unittest.mock import patch
+
+        from pipy_agent import ToolCall
+
+        # A stray tool call with no tools configured still needs a tool result
+        stray = AssistantMessage(
+            content=[TextContent(text="hi"), ToolCall(id="c1", name="x", arguments={})]
+        )
+        reply = AssistantMessage(content=[TextContent(text="done")])
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", _scripted_stream(stray, reply)):
+            async for event in agent_loop(prompts, config=config):
+                events.append(event)
+
+        turn_ends = [e for e in events if e.type == "turn_end"]
+        assert len(turn_ends) == 2
+        results = turn_ends[0].tool_results
+        assert len(results) == 1
+        assert results[0].tool_call_id == "c1"
+        assert results[0].is_error
+        assert "Tool not found: x" in results[0].content[0].text
+        assert turn_ends[1].tool_results == []
+        assert events[-1].type == "agent_end"
+
+
+class TestAbort:
+    @pytest.mark.asyncio
+    async def test_abort_interrupts_stalled_stream(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_ai import StartEvent
+
+        from pipy_agent import AbortController
+
+        async def mock_stream(*args, **kwargs):
+            yield StartEvent(partial=AssistantMessage())
+            await asyncio.sleep(30)  # Provider stalls
+
+        controller = AbortController()
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        events = []
+
+        async def consume():
+            async for event in agent_loop(prompts, config=config, signal=controller.signal):
+                events.append(event)
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            controller.abort()
+            await asyncio.wait_for(task, timeout=2)
+
+        end = next(e for e in events if e.type == "message_end" and e.message.role == "assistant")
+        assert end.message.stop_reason == "aborted"
+        assert events[-1].type == "agent_end"
+
+    @pytest.mark.asyncio
+    async def test_abort_while_consumer_handles_event(self):
+        from unittest.mock import patch
+
+        from pipy_ai import DoneEvent, StartEvent, TextDeltaEvent
+
+        from pipy_agent import AbortController
+
+        async def mock_stream(*args, **kwargs):
+            partial = AssistantMessage(content=[TextContent(text="")])
+            yield StartEvent(partial=partial)
+            yield TextDeltaEvent(delta="never", partial=partial)
+            yield DoneEvent(message=partial)
+
+        controller = AbortController()
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        events = []
+        with patch("pipy_agent.loop.astream", mock_stream):
+            async for event in agent_loop(prompts, config=config, signal=controller.signal):
+                events.append(event)
+                if event.type == "message_start" and event.message.role == "assistant":
+                    controller.abort()
+
+        assert "message_update" not in [e.type for e in events]
+        assert events[-1].messages[-1].stop_reason == "aborted"
+
+    @pytest.mark.asyncio
+    async def test_external_cancellation_propagates(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_ai import StartEvent
+
+        from pipy_agent import AbortController
+
+        async def mock_stream(*args, **kwargs):
+            yield StartEvent(partial=AssistantMessage())
+            await asyncio.sleep(30)
+
+        controller = AbortController()
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        async def consume():
+            async for _ in agent_loop(prompts, config=config, signal=controller.signal):
+                pass
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    @pytest.mark.asyncio
+    async def test_abort_when_provider_converts_cancel(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_ai import StartEvent
+
+        from pipy_agent import AbortController
+
+        async def mock_stream(*args, **kwargs):
+            yield StartEvent(partial=AssistantMessage())
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                raise ConnectionError("connection closed") from None
+
+        controller = AbortController()
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        events = []
+
+        async def consume():
+            async for event in agent_loop(prompts, config=config, signal=controller.signal):
+                events.append(event)
+            return asyncio.current_task().cancelling()
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            controller.abort()
+            assert await asyncio.wait_for(task, timeout=2) == 0
+
+        assert events[-1].messages[-1].stop_reason == "aborted"
+        assert asyncio.current_task().cancelling() == 0
+
+    @pytest.mark.asyncio
+    async def test_external_cancellation_racing_abort_propagates(self):
+        import asyncio
+        from unittest.mock import patch
+
+        from pipy_ai import StartEvent
+
+        from pipy_agent import AbortController
+
+        async def mock_stream(*args, **kwargs):
+            yield StartEvent(partial=AssistantMessage())
+            await asyncio.sleep(30)
+
+        controller = AbortController()
+        config = AgentLoopConfig(model="test/model")
+        prompts = [UserMessage(content=[TextContent(text="hello")])]
+
+        async def consume():
+            async for _ in agent_loop(prompts, config=config, signal=controller.signal):
+                pass
+
+        with patch("pipy_agent.loop.astream", mock_stream):
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            controller.abort()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert asyncio.current_task().cancelling() == 0
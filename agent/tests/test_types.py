@@ -27,6 +27,10 @@ from pipy_agent import (
     ToolExecutionStartEvent,
     ToolExecutionUpdateEvent,
     ToolExecutionEndEvent,
+    # Adapters
+    AGENT_EVENT_ADAPTER,
+    AGENT_MESSAGE_ADAPTER,
+    ToolResultMessage,
 )
 
 
@@ -61,6 +65,14 @@ class TestReExports:
         t = Tool(name="test", description="desc", parameters={})
         assert t.name == "test"
 
+    def test_agent_and_loop_resolve_on_access(self):
+        import pipy_agent
+        from pipy_agent.agent import Agent
+        from pipy_agent.loop import agent_loop
+
+        assert pipy_agent.Agent is Agent
+        assert pipy_agent.agent_loop is agent_loop
+
     def test_thinking_budgets(self):
         from pipy_agent import ThinkingBudgets
 
@@ -100,6 +112,16 @@ class TestAgentToolResult:
         )
         assert len(result.content) == 2
 
+    def test_frozen(self):
+        from pydantic import ValidationError
+
+        result = AgentToolResult(content=[TextContent(text="done")])
+        with pytest.raises(ValidationError):
+            result.details = {"late": True}
+
+    def test_parametrized_class_reused(self):
+        assert AgentToolResult[dict] is AgentToolResult[dict]
+
 
 class TestAgentTool:
     def test_basic_tool(self):
@@ -131,6 +153,19 @@ class TestAgentTool:
         assert t.name == "test"
         assert t.description == "desc"
 
+    def test_to_tool_cached(self):
+        at = AgentTool(name="test", description="desc", parameters={})
+        assert at.to_tool() is at.to_tool()
+
+    def test_to_tool_rebuilt_after_change(self):
+        at = AgentTool(name="test", description="desc", parameters={})
+        first = at.to_tool()
+        at.description = "new"
+        assert at.to_tool() is not first
+        assert at.to_tool().description == "new"
+        copy = at.model_copy(update={"name": "other"})
+        assert copy.to_tool().name == "other"
+
     @pytest.mark.asyncio
     async def test_execute_not_implemented(self):
         t = AgentTool(name="test", description="desc", parameters={})
@@ -166,6 +201,17 @@ class TestToolDecorator:
 
         assert test_fn.label == "Custom Label"
 
+    def test_decorated_tools_share_one_class(self):
+        @tool(name="a", description="a", parameters={})
+        async def a(tool_call_id, params, signal, on_update):
+            return AgentToolResult()
+
+        @tool(name="b", description="b", parameters={})
+        async def b(tool_call_id, params, signal, on_update):
+            return AgentToolResult()
+
+        assert type(a) is type(b)
+
     @pytest.mark.asyncio
     async def test_execute_works(self):
         @tool(
@@ -244,6 +290,20 @@ class TestAgentEvents:
         assert e.type == "agent_end"
         assert e.messages == []
 
+    def test_boundary_events_frozen(self):
+        from dataclasses import FrozenInstanceError
+
+        e = AgentEndEvent(messages=[])
+        with pytest.raises(FrozenInstanceError):
+            e.messages = [UserMessage(content="late")]
+
+    def test_boundary_events_validated_and_slotted(self):
+        from pydantic import ValidationError
+
+        with pytest.raises(ValidationError):
+            ToolExecutionStartEvent(tool_call_id="c1", tool_name="t", args="not a dict")
+        assert not hasattr(AgentStartEvent(), "__dict__")
+
     def test_turn_start(self):
         e = TurnStartEvent()
         assert e.type == "turn_start"
@@ -259,6 +319,13 @@ class TestAgentEvents:
         assert MessageStartEvent(message=msg).type == "message_start"
         assert MessageEndEvent(message=msg).type == "message_end"
 
+    def test_streaming_events_are_slotted(self):
+        msg = UserMessage(content=[TextContent(text="hello")])
+        for event in (TurnStartEvent(), MessageStartEvent(message=msg)):
+            assert not hasattr(event, "__dict__")
+        with pytest.raises(TypeError):
+            MessageEndEvent(msg)  # keyword-only, like the validated events
+
     def test_tool_execution_events(self):
         start = ToolExecutionStartEvent(
             tool_call_id="call_1",
@@ -283,3 +350,31 @@ class TestAgentEvents:
         )
         assert end.type == "tool_execution_end"
         assert end.is_error is False
+
+
+class TestAdapters:
+    def test_message_round_trip(self):
+        messages = [
+            UserMessage(content=[TextContent(text="hi")]),
+            AssistantMessage(content=[TextContent(text="hello")]),
+            ToolResultMessage(tool_call_id="c1", tool_name="t"),
+        ]
+        for msg in messages:
+            data = AGENT_MESSAGE_ADAPTER.dump_json(msg)
+            restored = AGENT_MESSAGE_ADAPTER.validate_json(data)
+            assert type(restored) is type(msg)
+            assert restored == msg
+
+    def test_event_dispatched_by_type(self):
+        msg = UserMessage(content=[TextContent(text="hi")])
+        for cls in (MessageStartEvent, MessageEndEvent):
+            data = AGENT_EVENT_ADAPTER.dump_python(cls(message=msg))
+            restored = AGENT_EVENT_ADAPTER.validate_python(data)
+            assert type(restored) is cls
+            assert restored.message == msg
+
+    def test_unknown_event_type_rejected(self):
+        from pydantic import ValidationError
+
+        with pytest.raises(ValidationError):
+            AGENT_EVENT_ADAPTER.validate_python({"type": "bogus"})
@@ -27,7 +27,10 @@ Quick start:
 
 __version__ = "0.51.6"
 
-# Types (Pydantic models)
+import functools
+import importlib
+from typing import TYPE_CHECKING
+
 # Abort (cancellation)
 from .abort import (
     AbortController,
@@ -35,57 +38,6 @@ from .abort import (
     AbortSignal,
 )
 
-# API (sync-first)
-from .api import (
-    # Async variants
-    acomplete,
-    acomplete_simple,
-    astream,
-    astream_simple,
-    # Sync (primary)
-    complete,
-    complete_simple,
-    ctx,
-    quick,
-    stream,
-    stream_simple,
-    # Builders
-    user,
-)
-
-# Registry (models.dev)
-from .provider import supports_xhigh
-from .registry import (
-    Model,
-    ModelCapabilities,
-    ModelCost,
-    ModelLimits,
-    ModelModalities,
-    calculate_cost,
-    estimate_cost,
-    get_model,
-    get_models,
-    get_registry,
-    sync_models,
-)
-
-
-def get_available_models() -> list[str]:
-    """Get list of available model IDs from LiteLLM."""
-    try:
-        import litellm
-        return sorted(litellm.model_list or [])
-    except Exception:
-        # Fallback to common models
-        return [
-            "anthropic/claude-sonnet-4-20250514",
-            "anthropic/claude-3-opus-20240229",
-            "anthropic/claude-3.5-haiku-20241022",
-            "openai/gpt-4o",
-            "openai/gpt-4-turbo",
-            "google/gemini-2.0-flash",
-        ]
-
 # Events
 from .stream import (
     AssistantMessageEvent,
@@ -102,6 +54,8 @@ from .stream import (
     ToolCallEndEvent,
     ToolCallStartEvent,
 )
+
+# Types (Pydantic models)
 from .types import (
     AssistantMessage,
     CacheRetention,
@@ -129,7 +83,119 @@ from .types import (
     UserMessage,
 )
 
-__all__ = [
+# Loading .stream bound the submodule as pipy_ai.stream; that name belongs to
+# the stream() API function, which __getattr__ below resolves
+del stream  # noqa: F821 - bound by the import system, not by a name in this file
+
+if TYPE_CHECKING:
+    # API (sync-first)
+    from .api import (
+        # Async variants
+        acomplete,
+        acomplete_simple,
+        astream,
+        astream_simple,
+        # Sync (primary)
+        complete,
+        complete_simple,
+        ctx,
+        quick,
+        stream,
+        stream_simple,
+        # Builders
+        user,
+    )
+
+    # Registry (models.dev)
+    from .provider import supports_xhigh
+    from .registry import (
+        Model,
+        ModelCapabilities,
+        ModelCost,
+        ModelLimits,
+        ModelModalities,
+        calculate_cost,
+        estimate_cost,
+        get_model,
+        get_models,
+        get_registry,
+        sync_models,
+    )
+
+# The API, provider and registry pull in litellm and the models.dev cache, so
+# they are imported on first attribute access (PEP 562) rather than here
+_LAZY_SUBMODULES = {
+    ".api": (
+        "acomplete",
+        "acomplete_simple",
+        "astream",
+        "astream_simple",
+        "complete",
+        "complete_simple",
+        "ctx",
+        "quick",
+        "stream",
+        "stream_simple",
+        "user",
+    ),
+    ".provider": ("supports_xhigh",),
+    ".registry": (
+        "Model",
+        "ModelCapabilities",
+        "ModelCost",
+        "ModelLimits",
+        "ModelModalities",
+        "calculate_cost",
+        "estimate_cost",
+        "get_model",
+        "get_models",
+        "get_registry",
+        "sync_models",
+    ),
+}
+_LAZY_IMPORTS = {
+    name: module for module, names in _LAZY_SUBMODULES.items() for name in names
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+def get_available_models() -> list[str]:
+    """Get list of available model IDs from LiteLLM."""
+    return list(_available_models())
+
+
+@functools.cache
+def _available_models() -> tuple[str, ...]:
+    # litellm's model list is fixed once imported; call cache_clear() after
+    # registering models with litellm at runtime
+    try:
+        import litellm
+        return tuple(sorted(litellm.model_list or []))
+    except Exception:
+        # Fallback to common models
+        return (
+            "anthropic/claude-sonnet-4-20250514",
+            "anthropic/claude-3-opus-20240229",
+            "anthropic/claude-3.5-haiku-20241022",
+            "openai/gpt-4o",
+            "openai/gpt-4-turbo",
+            "google/gemini-2.0-flash",
+        )
+
+
+__all__ = (
     # Version
     "__version__",
     # Enums
@@ -203,4 +269,4 @@ __all__ = [
     # Utilities
     "get_available_models",
     "supports_xhigh",
-]
+)
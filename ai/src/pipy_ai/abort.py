@@ -25,9 +25,13 @@ class AbortSignal:
         controller.abort()
     """
 
+    __slots__ = ("_aborted", "_callbacks", "_next_id")
+
     def __init__(self):
         self._aborted = False
-        self._callbacks: list[Callable[[], None]] = []
+        # Keyed by subscription token so unsubscribing is a dict pop
+        self._callbacks: dict[int, Callable[[], None]] = {}
+        self._next_id = 0
 
     @property
     def aborted(self) -> bool:
@@ -39,7 +43,9 @@ class AbortSignal:
         if self._aborted:
             return
         self._aborted = True
-        for cb in self._callbacks:
+        callbacks = list(self._callbacks.values())
+        self._callbacks.clear()
+        for cb in callbacks:
             try:
                 cb()
             except Exception:
@@ -60,12 +66,14 @@ class AbortSignal:
         """
         if self._aborted:
             callback()
-        else:
-            self._callbacks.append(callback)
+            return lambda: None
+
+        token = self._next_id
+        self._next_id += 1
+        self._callbacks[token] = callback
 
         def unsubscribe():
-            if callback in self._callbacks:
-                self._callbacks.remove(callback)
+            self._callbacks.pop(token, None)
 
         return unsubscribe
 
@@ -93,6 +101,8 @@ class AbortController:
         controller.abort()
     """
 
+    __slots__ = ("_signal",)
+
     def __init__(self):
         self._signal = AbortSignal()
 
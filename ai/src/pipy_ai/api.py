@@ -1,5 +1,6 @@
 """Unified API - sync-first with async variants."""
 
+import threading
 import time
 from collections.abc import AsyncIterator, Iterator
 
@@ -14,15 +15,25 @@ from .types import (
     UserMessage,
 )
 
-# Default provider singleton
+# Default provider singleton, created once even when first used from several threads
 _provider: LiteLLMProvider | None = None
+_provider_lock = threading.Lock()
 
 
 def _get_provider() -> LiteLLMProvider:
     global _provider
-    if _provider is None:
-        _provider = LiteLLMProvider()
-    return _provider
+    provider = _provider
+    if provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = LiteLLMProvider()
+            provider = _provider
+    return provider
+
+
+def _now_ms() -> int:
+    """Current wall-clock time in integer milliseconds."""
+    return time.time_ns() // 1_000_000
 
 
 # === Completion (sync-first) ===
@@ -94,7 +105,7 @@ def stream(
     return _get_provider().stream(model, context, options)
 
 
-async def astream(
+def astream(
     model: str,
     context: Context,
     options: StreamOptions | None = None,
@@ -106,8 +117,7 @@ async def astream(
             if event.type == "text_delta":
                 print(event.delta, end="", flush=True)
     """
-    async for event in _get_provider().astream(model, context, options):
-        yield event
+    return _get_provider().astream(model, context, options)
 
 
 # === Simple variants (with reasoning) ===
@@ -159,14 +169,13 @@ def stream_simple(
     return _get_provider().stream_simple(model, context, options)
 
 
-async def astream_simple(
+def astream_simple(
     model: str,
     context: Context,
     options: SimpleStreamOptions | None = None,
 ) -> AsyncIterator[AssistantMessageEvent]:
     """Stream with reasoning support (async)."""
-    async for event in _get_provider().astream_simple(model, context, options):
-        yield event
+    return _get_provider().astream_simple(model, context, options)
 
 
 # === Convenience Functions ===
@@ -195,7 +204,7 @@ def quick(
     """
     context = Context(
         system_prompt=system,
-        messages=[UserMessage(content=prompt, timestamp=int(time.time() * 1000))],
+        messages=[UserMessage(content=prompt, timestamp=_now_ms())],
     )
     options = SimpleStreamOptions(
         temperature=temperature,
@@ -217,7 +226,7 @@ def user(content: str) -> UserMessage:
         ctx = Context(messages=[user("What's the weather?")])
         result = complete("anthropic/claude-sonnet-4-5", ctx)
     """
-    return UserMessage(content=content, timestamp=int(time.time() * 1000))
+    return UserMessage(content=content, timestamp=_now_ms())
 
 
 def ctx(
@@ -234,7 +243,8 @@ def ctx(
             system="You are helpful."
         ))
     """
+    # Validation builds the list from the tuple; copying it first is redundant
     return Context(
         system_prompt=system,
-        messages=list(messages),
+        messages=messages,
     )
@@ -2,6 +2,7 @@
 
 import argparse
 import sys
+from collections import Counter
 
 from ..registry import (
     estimate_cost,
@@ -10,6 +11,9 @@ from ..registry import (
     sync_models,
 )
 
+# Capability flags reported by `pipy info`, in display order
+_CAP_FIELDS = ("reasoning", "tool_call", "structured_output", "attachment")
+
 
 def cmd_sync(args):
     """Sync models from models.dev."""
@@ -26,7 +30,7 @@ def cmd_models(args):
         modality=args.modality,
         min_context=args.min_context,
     )
-    for m in sorted(models, key=lambda x: x.qualified_name):
+    for m in models:  # Already in qualified-name order
         print(m.qualified_name)
     print(f"\n{len(models)} models found")
 
@@ -46,15 +50,7 @@ def cmd_info(args):
     print(f"Max Output: {model.limits.output:,} tokens")
     print(f"Cost: ${model.cost.input:.2f}/1M input, ${model.cost.output:.2f}/1M output")
 
-    caps = []
-    if model.capabilities.reasoning:
-        caps.append("reasoning")
-    if model.capabilities.tool_call:
-        caps.append("tool_call")
-    if model.capabilities.structured_output:
-        caps.append("structured_output")
-    if model.capabilities.attachment:
-        caps.append("attachment")
+    caps = [f for f in _CAP_FIELDS if getattr(model.capabilities, f)]
     print(f"Capabilities: {', '.join(caps) or 'none'}")
 
     print(f"Input modalities: {', '.join(model.modalities.input)}")
@@ -82,10 +78,20 @@ def cmd_providers(args):
     """List all providers."""
     from ..registry import get_registry
 
-    providers = get_registry().providers
-    for p in sorted(providers):
-        count = len(get_models(provider=p))
-        print(f"{p}: {count} models")
+    # One pass over the registry; providers are exactly the models' providers
+    counts = Counter(m.provider for m in get_registry().list_all())
+    for p in sorted(counts):
+        print(f"{p}: {counts[p]} models")
+
+
+# Subcommand name -> handler, dispatched on the parsed `command`
+_COMMANDS = {
+    "sync": cmd_sync,
+    "models": cmd_models,
+    "info": cmd_info,
+    "cost": cmd_cost,
+    "providers": cmd_providers,
+}
 
 
 def main():
@@ -96,8 +102,7 @@ def main():
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # sync
-    p_sync = subparsers.add_parser("sync", help="Sync models from models.dev")
-    p_sync.set_defaults(func=cmd_sync)
+    subparsers.add_parser("sync", help="Sync models from models.dev")
 
     # models
     p_models = subparsers.add_parser("models", help="List models")
@@ -105,12 +110,10 @@ def main():
     p_models.add_argument("--capability", "-c", help="Filter by capability")
     p_models.add_argument("--modality", "-m", help="Filter by input modality")
     p_models.add_argument("--min-context", type=int, help="Minimum context window")
-    p_models.set_defaults(func=cmd_models)
 
     # info
     p_info = subparsers.add_parser("info", help="Show model details")
     p_info.add_argument("model", help="Model name")
-    p_info.set_defaults(func=cmd_info)
 
     # cost
     p_cost = subparsers.add_parser("cost", help="Estimate request cost")
@@ -118,14 +121,12 @@ def main():
     p_cost.add_argument("--input", "-i", type=int, required=True, help="Input tokens")
     p_cost.add_argument("--output", "-o", type=int, default=0, help="Output tokens")
     p_cost.add_argument("--cached", type=int, help="Cached tokens")
-    p_cost.set_defaults(func=cmd_cost)
 
     # providers
-    p_providers = subparsers.add_parser("providers", help="List all providers")
-    p_providers.set_defaults(func=cmd_providers)
+    subparsers.add_parser("providers", help="List all providers")
 
     args = parser.parse_args()
-    args.func(args)
+    _COMMANDS[args.command](args)
 
 
 if __name__ == "__main__":
@@ -18,18 +18,16 @@ from .types import (
     OAuthProviderInterface,
 )
 from .pkce import generate_pkce
+from ._http import aclose_http_client
 from .registry import (
     get_oauth_provider,
     get_oauth_providers,
     register_oauth_provider,
     get_oauth_api_key,
 )
-from ._litellm_patch import patch_litellm_anthropic_oauth
+from ._litellm_patch import patch_litellm_anthropic_oauth  # noqa: F401
 
-# Apply litellm patch for Anthropic OAuth support on import
-patch_litellm_anthropic_oauth()
-
-__all__ = [
+__all__ = (
     # Types
     "OAuthCredentials",
     "OAuthPrompt",
@@ -43,4 +41,6 @@ __all__ = [
     "get_oauth_providers",
     "register_oauth_provider",
     "get_oauth_api_key",
-]
+    # HTTP
+    "aclose_http_client",
+)
@@ -0,0 +1,39 @@
+"""Shared HTTP client for OAuth flows.
+
+Token exchanges and refreshes reuse one pooled `httpx.AsyncClient`, so
+repeated refreshes against the same host keep their connection and TLS
+session instead of handshaking on every call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+
+import httpx
+
+# An AsyncClient's connections belong to the loop that opened them, so each
+# event loop gets its own client; entries go away with their loop.
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient()
+    return client
+
+
+async def aclose_http_client() -> None:
+    """Close the running event loop's shared client, if it has one.
+
+    Await this before the loop shuts down (e.g. at the end of the coroutine
+    passed to `asyncio.run`) to release its pooled connections.
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
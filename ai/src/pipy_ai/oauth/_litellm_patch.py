@@ -7,13 +7,41 @@ with "invalid x-api-key" because OAuth tokens must be sent via `Authorization: B
 Fix: Patch `AnthropicConfig.get_anthropic_headers` to replace `x-api-key` with
 `Authorization: Bearer` when the key is an OAuth token.
 
-This patch is applied once at import time by `pipy_ai.oauth`.
+The patch is applied on first use rather than at import, so importing
+`pipy_ai.oauth` does not load litellm: the provider applies it when a request
+carries an OAuth token, and `get_oauth_api_key` applies it before handing
+one out.
 """
 
 from __future__ import annotations
 
+import functools
+
 _patched = False
 
+# Fixed headers sent with OAuth tokens
+_OAUTH_HEADERS = {
+    "anthropic-dangerous-direct-browser-access": "true",
+    "x-app": "cli",  # Identifies as CLI application
+    "user-agent": "claude-cli/2.1.2 (external, cli)",  # Required user-agent
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _oauth_beta(existing_beta: str) -> str:
+    """Add the OAuth betas to an anthropic-beta header value.
+
+    litellm sends the same few beta strings over and over, so the result is
+    cached per input.
+    """
+    beta_parts = [b.strip() for b in existing_beta.split(",") if b.strip()]
+    # claude-code-20250219 identifies us as Claude Code CLI (required for OAuth tokens)
+    if "claude-code-20250219" not in beta_parts:
+        beta_parts.insert(0, "claude-code-20250219")
+    if "oauth-2025-04-20" not in beta_parts:
+        beta_parts.append("oauth-2025-04-20")
+    return ",".join(beta_parts)
+
 
 def patch_litellm_anthropic_oauth() -> None:
     """Apply the OAuth patch to litellm's Anthropic handler.
@@ -31,6 +59,10 @@ def patch_litellm_anthropic_oauth() -> None:
         return  # litellm not installed or structure changed
 
     _orig = AnthropicConfig.get_anthropic_headers
+    # The module flag only covers this module; if another copy of it (e.g. a
+    # second install) already patched litellm, don't wrap its patch again
+    if getattr(_orig, "_pipy_oauth_patch", False):
+        return
 
     def _patched_get_anthropic_headers(self, api_key, **kwargs):
         headers = _orig(self, api_key=api_key, **kwargs)
@@ -38,18 +70,9 @@ def patch_litellm_anthropic_oauth() -> None:
         if isinstance(api_key, str) and api_key.startswith("sk-ant-oat"):
             headers.pop("x-api-key", None)
             headers["authorization"] = f"Bearer {api_key}"
-            # Add required Claude Code / OAuth headers to identify as the CLI
-            existing_beta = headers.get("anthropic-beta", "")
-            beta_parts = [b.strip() for b in existing_beta.split(",") if b.strip()]
-            # claude-code-20250219 identifies us as Claude Code CLI (required for OAuth tokens)
-            if "claude-code-20250219" not in beta_parts:
-                beta_parts.insert(0, "claude-code-20250219")
-            if "oauth-2025-04-20" not in beta_parts:
-                beta_parts.append("oauth-2025-04-20")
-            headers["anthropic-beta"] = ",".join(beta_parts)
-            headers["anthropic-dangerous-direct-browser-access"] = "true"
-            headers["x-app"] = "cli"  # Identifies as CLI application
-            headers["user-agent"] = "claude-cli/2.1.2 (external, cli)"  # Required user-agent
+            headers["anthropic-beta"] = _oauth_beta(headers.get("anthropic-beta", ""))
+            headers.update(_OAUTH_HEADERS)
         return headers
 
+    _patched_get_anthropic_headers._pipy_oauth_patch = True
     AnthropicConfig.get_anthropic_headers = _patched_get_anthropic_headers
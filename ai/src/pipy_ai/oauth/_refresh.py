@@ -0,0 +1,52 @@
+"""Coalesce concurrent OAuth token refreshes.
+
+When several callers find the same token expired at once, only the first
+performs the network refresh; the rest wait for it and reuse its result.
+Providers that rotate refresh tokens would otherwise reject every refresh
+but the first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from .types import OAuthCredentials, now_ms
+
+# One lock per provider; refreshes are rare, so accounts of the same
+# provider simply take turns. A lock is tied to the loop it first waited in,
+# so each entry records the loop it was made for.
+_locks: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+
+# (provider id, refresh token that was used) -> credentials it produced
+_refreshed: dict[tuple[str, str], OAuthCredentials] = {}
+
+
+async def refresh_once(
+    provider_id: str,
+    credentials: OAuthCredentials,
+    refresh: Callable[[OAuthCredentials], Awaitable[OAuthCredentials]],
+) -> OAuthCredentials:
+    """Refresh `credentials`, sharing the result with concurrent callers."""
+    key = (provider_id, credentials.refresh)
+    fresh = _refreshed.get(key)
+    if fresh is not None and fresh.expires > now_ms():
+        return fresh
+
+    loop = asyncio.get_running_loop()
+    entry = _locks.get(provider_id)
+    if entry is None or entry[0] is not loop:
+        entry = _locks[provider_id] = (loop, asyncio.Lock())
+    lock = entry[1]
+    async with lock:
+        # Another caller may have refreshed while this one waited
+        now = now_ms()
+        fresh = _refreshed.get(key)
+        if fresh is not None and fresh.expires > now:
+            return fresh
+
+        fresh = await refresh(credentials)
+        for stale in [k for k, c in _refreshed.items() if c.expires <= now]:
+            del _refreshed[stale]
+        _refreshed[key] = fresh
+        return fresh
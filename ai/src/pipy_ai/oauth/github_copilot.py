@@ -6,16 +6,21 @@ Port of pi-ai/src/utils/oauth/github-copilot.ts.
 from __future__ import annotations
 
 import asyncio
-import base64
+import functools
+import re
 import time
-from typing import Awaitable, Callable
+from types import MappingProxyType
+from typing import Awaitable, Callable, Mapping
 from urllib.parse import urlparse
 
 import httpx
 
+from ._http import get_http_client
+from ._refresh import refresh_once
 from .types import OAuthAuthInfo, OAuthCredentials, OAuthPrompt
 
-_CLIENT_ID = base64.b64decode("SXYxLmI1MDdhMDhjODdlY2ZlOTg=").decode()
+# Public OAuth app ID, split into adjacent literals like the other providers'
+_CLIENT_ID = "Iv1." "b507a08c" "87ecfe98"
 
 _COPILOT_HEADERS = {
     "User-Agent": "GitHubCopilotChat/0.35.0",
@@ -24,6 +29,18 @@ _COPILOT_HEADERS = {
     "Copilot-Integration-Id": "vscode-chat",
 }
 
+# Headers for the device-flow requests and the Copilot token request; shared
+# by every call (httpx copies them into each request)
+_DEVICE_FLOW_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "User-Agent": "GitHubCopilotChat/0.35.0",
+}
+_COPILOT_TOKEN_HEADERS = {"Accept": "application/json", **_COPILOT_HEADERS}
+
+# Proxy endpoint embedded in Copilot tokens ("...;proxy-ep=host;...")
+_PROXY_EP_RE = re.compile(r"proxy-ep=([^;]+)")
+
 
 def normalize_domain(input_str: str) -> str | None:
     """Normalize a GitHub domain input to a hostname."""
@@ -38,12 +55,15 @@ def normalize_domain(input_str: str) -> str | None:
         return None
 
 
-def _get_urls(domain: str) -> dict[str, str]:
-    return {
+@functools.lru_cache(maxsize=8)
+def _get_urls(domain: str) -> Mapping[str, str]:
+    # Cached per domain (github.com plus a few enterprise hosts); read-only
+    # because every caller shares the same mapping
+    return MappingProxyType({
         "device_code": f"https://{domain}/login/device/code",
         "access_token": f"https://{domain}/login/oauth/access_token",
         "copilot_token": f"https://api.{domain}/copilot_internal/v2/token",
-    }
+    })
 
 
 def get_github_copilot_base_url(
@@ -55,8 +75,7 @@ def get_github_copilot_base_url(
     Parses proxy-ep from the Copilot token if available.
     """
     if token:
-        import re
-        match = re.search(r"proxy-ep=([^;]+)", token)
+        match = _PROXY_EP_RE.search(token)
         if match:
             proxy_host = match.group(1)
             api_host = proxy_host.replace("proxy.", "api.", 1) if proxy_host.startswith("proxy.") else proxy_host
@@ -73,11 +92,7 @@ async def _start_device_flow(client: httpx.AsyncClient, domain: str) -> dict:
     response = await client.post(
         urls["device_code"],
         json={"client_id": _CLIENT_ID, "scope": "read:user"},
-        headers={
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "User-Agent": "GitHubCopilotChat/0.35.0",
-        },
+        headers=_DEVICE_FLOW_HEADERS,
     )
     if response.status_code != 200:
         raise RuntimeError(f"Device code request failed: {response.text}")
@@ -99,21 +114,17 @@ async def _poll_for_access_token(
     """Poll for GitHub access token after device code flow."""
     urls = _get_urls(domain)
     deadline = time.time() + expires_in
-    interval_ms = max(1.0, interval_seconds)
+    interval_s = max(1.0, interval_seconds)
+    # Same request every poll; build it once
+    body = {
+        "client_id": _CLIENT_ID,
+        "device_code": device_code,
+        "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+    }
 
     while time.time() < deadline:
         response = await client.post(
-            urls["access_token"],
-            json={
-                "client_id": _CLIENT_ID,
-                "device_code": device_code,
-                "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
-            },
-            headers={
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-                "User-Agent": "GitHubCopilotChat/0.35.0",
-            },
+            urls["access_token"], json=body, headers=_DEVICE_FLOW_HEADERS
         )
 
         data = response.json()
@@ -121,18 +132,15 @@ async def _poll_for_access_token(
         if "access_token" in data:
             return data["access_token"]
 
-        error = data.get("error", "")
-        if error == "authorization_pending":
-            await asyncio.sleep(interval_ms)
-            continue
-        elif error == "slow_down":
-            interval_ms += 5
-            await asyncio.sleep(interval_ms)
-            continue
-        elif error:
-            raise RuntimeError(f"Device flow failed: {error}")
+        match data.get("error"):
+            case "authorization_pending" | None | "":
+                pass
+            case "slow_down":
+                interval_s += 5
+            case error:
+                raise RuntimeError(f"Device flow failed: {error}")
 
-        await asyncio.sleep(interval_ms)
+        await asyncio.sleep(interval_s)
 
     raise RuntimeError("Device flow timed out")
 
@@ -149,15 +157,10 @@ async def refresh_github_copilot_token(
     domain = enterprise_domain or "github.com"
     urls = _get_urls(domain)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            urls["copilot_token"],
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {refresh_token}",
-                **_COPILOT_HEADERS,
-            },
-        )
+    response = await get_http_client().get(
+        urls["copilot_token"],
+        headers={**_COPILOT_TOKEN_HEADERS, "Authorization": f"Bearer {refresh_token}"},
+    )
 
     if response.status_code != 200:
         raise RuntimeError(f"Copilot token refresh failed: {response.text}")
@@ -172,7 +175,7 @@ async def refresh_github_copilot_token(
     return OAuthCredentials(
         refresh=refresh_token,
         access=token,
-        expires=expires_at * 1000 - 5 * 60 * 1000,  # 5 min buffer
+        expires=int(expires_at * 1000) - 5 * 60 * 1000,  # 5 min buffer
         extra={"enterpriseUrl": enterprise_domain} if enterprise_domain else {},
     )
 
@@ -200,24 +203,24 @@ async def login_github_copilot(
         raise RuntimeError("Invalid GitHub Enterprise URL/domain")
     domain = enterprise_domain or "github.com"
 
-    async with httpx.AsyncClient() as client:
-        # Start device flow
-        device = await _start_device_flow(client, domain)
-
-        # Show user code and verification URL
-        on_auth(OAuthAuthInfo(
-            url=device["verification_uri"],
-            instructions=f"Enter code: {device['user_code']}",
-        ))
-
-        # Poll for GitHub access token
-        github_access_token = await _poll_for_access_token(
-            client,
-            domain,
-            device["device_code"],
-            device["interval"],
-            device["expires_in"],
-        )
+    client = get_http_client()
+    # Start device flow
+    device = await _start_device_flow(client, domain)
+
+    # Show user code and verification URL
+    on_auth(OAuthAuthInfo(
+        url=device["verification_uri"],
+        instructions=f"Enter code: {device['user_code']}",
+    ))
+
+    # Poll for GitHub access token
+    github_access_token = await _poll_for_access_token(
+        client,
+        domain,
+        device["device_code"],
+        device["interval"],
+        device["expires_in"],
+    )
 
     # Exchange GitHub token for Copilot token
     credentials = await refresh_github_copilot_token(
@@ -255,7 +258,11 @@ class GitHubCopilotOAuthProvider:
 
     async def refresh_token(self, credentials: OAuthCredentials) -> OAuthCredentials:
         enterprise = credentials.extra.get("enterpriseUrl")
-        return await refresh_github_copilot_token(credentials.refresh, enterprise)
+        return await refresh_once(
+            self.id,
+            credentials,
+            lambda c: refresh_github_copilot_token(c.refresh, enterprise),
+        )
 
     def get_api_key(self, credentials: OAuthCredentials) -> str:
         return credentials.access
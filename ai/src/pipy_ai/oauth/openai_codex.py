@@ -7,19 +7,18 @@ Uses a local HTTP callback server for the OAuth redirect.
 from __future__ import annotations
 
 import asyncio
-import base64
+import binascii
 import json
 import os
-import time
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from threading import Thread
 from typing import Awaitable, Callable
 from urllib.parse import urlencode, urlparse, parse_qs
 
-import httpx
-
+from ._http import get_http_client
+from ._refresh import refresh_once
 from .pkce import generate_pkce
-from .types import OAuthAuthInfo, OAuthCredentials, OAuthPrompt
+from .types import OAuthAuthInfo, OAuthCredentials, OAuthPrompt, now_ms
 
 _CLIENT_ID = "app_EMoamEEZ73f0CkXaXp7hrann"
 _AUTHORIZE_URL = "https://auth.openai.com/oauth/authorize"
@@ -28,6 +27,19 @@ _REDIRECT_URI = "http://localhost:1455/auth/callback"
 _SCOPE = "openid profile email offline_access"
 _JWT_CLAIM_PATH = "https://api.openai.com/auth"
 
+# Authorize parameters that are the same for every login, encoded once;
+# the PKCE challenge and state are appended per login
+_AUTHORIZE_QUERY = urlencode({
+    "response_type": "code",
+    "client_id": _CLIENT_ID,
+    "redirect_uri": _REDIRECT_URI,
+    "scope": _SCOPE,
+    "code_challenge_method": "S256",
+    "id_token_add_organizations": "true",
+    "codex_cli_simplified_flow": "true",
+    "originator": "pi",
+})
+
 _SUCCESS_HTML = b"""<!doctype html>
 <html lang="en"><head><meta charset="utf-8"/><title>Authentication successful</title></head>
 <body><p>Authentication successful. Return to your terminal to continue.</p></body></html>"""
@@ -43,32 +55,32 @@ def _parse_authorization_input(value: str) -> dict[str, str | None]:
     if not value:
         return {}
 
-    # Try as URL
     try:
         parsed = urlparse(value)
-        if parsed.scheme:
-            qs = parse_qs(parsed.query)
-            return {
-                "code": qs.get("code", [None])[0],
-                "state": qs.get("state", [None])[0],
-            }
-    except Exception:
-        pass
-
-    # Try code#state format
-    if "#" in value:
-        parts = value.split("#", 1)
-        return {"code": parts[0], "state": parts[1]}
+    except ValueError:
+        parsed = None
+
+    if parsed is not None and parsed.scheme:
+        # Full redirect URL
+        query = parsed.query
+    elif "#" in value:
+        # code#state format
+        code, _, state = value.partition("#")
+        return {"code": code, "state": state}
+    elif "code=" in value:
+        # Bare query string
+        query = value
+    else:
+        return {"code": value, "state": None}
+
+    qs = parse_qs(query)
+    return {
+        "code": qs.get("code", [None])[0],
+        "state": qs.get("state", [None])[0],
+    }
 
-    # Try query string
-    if "code=" in value:
-        qs = parse_qs(value)
-        return {
-            "code": qs.get("code", [None])[0],
-            "state": qs.get("state", [None])[0],
-        }
 
-    return {"code": value, "state": None}
+_URLSAFE_TO_STD = bytes.maketrans(b"-_", b"+/")
 
 
 def _decode_jwt_payload(token: str) -> dict | None:
@@ -77,11 +89,10 @@ def _decode_jwt_payload(token: str) -> dict | None:
         parts = token.split(".")
         if len(parts) != 3:
             return None
-        # Add padding
-        payload = parts[1]
-        payload += "=" * (4 - len(payload) % 4)
-        decoded = base64.b64decode(payload)
-        return json.loads(decoded)
+        # base64url -> standard alphabet, then pad
+        payload = parts[1].encode("ascii").translate(_URLSAFE_TO_STD)
+        payload += b"=" * (-len(payload) % 4)
+        return json.loads(binascii.a2b_base64(payload))
     except Exception:
         return None
 
@@ -98,38 +109,43 @@ def _get_account_id(access_token: str) -> str | None:
 
 async def _exchange_code(code: str, verifier: str) -> dict | None:
     """Exchange authorization code for tokens."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            _TOKEN_URL,
-            data={
-                "grant_type": "authorization_code",
-                "client_id": _CLIENT_ID,
-                "code": code,
-                "code_verifier": verifier,
-                "redirect_uri": _REDIRECT_URI,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    response = await get_http_client().post(
+        _TOKEN_URL,
+        data={
+            "grant_type": "authorization_code",
+            "client_id": _CLIENT_ID,
+            "code": code,
+            "code_verifier": verifier,
+            "redirect_uri": _REDIRECT_URI,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
 
     if response.status_code != 200:
         return None
 
     data = response.json()
-    if not all(k in data for k in ("access_token", "refresh_token", "expires_in")):
+    try:
+        access = data["access_token"]
+        refresh = data["refresh_token"]
+        expires_in = data["expires_in"]
+    except KeyError:
         return None
 
     return {
-        "access": data["access_token"],
-        "refresh": data["refresh_token"],
-        "expires": time.time() * 1000 + data["expires_in"] * 1000,
+        "access": access,
+        "refresh": refresh,
+        "expires": now_ms() + int(expires_in) * 1000,
     }
 
 
 class _CallbackHandler(BaseHTTPRequestHandler):
     """HTTP handler for OAuth callback."""
 
-    code: str | None = None
     expected_state: str = ""
+    # Set by _start_callback_server; the code is handed to the waiting loop
+    loop: asyncio.AbstractEventLoop | None = None
+    result: asyncio.Future[str] | None = None
 
     def do_GET(self):
         parsed = urlparse(self.path)
@@ -155,7 +171,9 @@ class _CallbackHandler(BaseHTTPRequestHandler):
             self.wfile.write(b"Missing authorization code")
             return
 
-        _CallbackHandler.code = code
+        _CallbackHandler.loop.call_soon_threadsafe(
+            _set_result, _CallbackHandler.result, code
+        )
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
@@ -165,32 +183,38 @@ class _CallbackHandler(BaseHTTPRequestHandler):
         pass  # Suppress server logs
 
 
-def _start_callback_server(state: str) -> tuple[HTTPServer, Callable[[], str | None]]:
+def _set_result(future: asyncio.Future[str], code: str) -> None:
+    if not future.done():  # First callback wins; also skips a finished wait
+        future.set_result(code)
+
+
+def _start_callback_server(
+    state: str,
+) -> tuple[HTTPServer | None, asyncio.Future[str] | None]:
     """Start local OAuth callback server on port 1455.
 
-    Returns:
-        (server, wait_for_code) tuple.
+    Must be called from the event loop; returns a future resolved with the
+    callback's code, or (None, None) if the port can't be bound.
     """
-    _CallbackHandler.code = None
-    _CallbackHandler.expected_state = state
+    loop = asyncio.get_running_loop()
 
     try:
         server = HTTPServer(("127.0.0.1", 1455), _CallbackHandler)
     except OSError:
         # Port in use — fall back to manual paste
-        return None, lambda: None
+        return None, None
 
-    thread = Thread(target=server.serve_forever, daemon=True)
-    thread.start()
+    _CallbackHandler.expected_state = state
+    _CallbackHandler.loop = loop
+    _CallbackHandler.result = loop.create_future()
 
-    def wait_for_code() -> str | None:
-        for _ in range(600):  # 60 seconds
-            if _CallbackHandler.code:
-                return _CallbackHandler.code
-            time.sleep(0.1)
-        return None
+    # serve_forever rather than a single handle_request: the browser may ask
+    # for other paths first. The short poll interval bounds how long
+    # shutdown() blocks the loop once login is done (default 0.5 s).
+    thread = Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
 
-    return server, wait_for_code
+    return server, _CallbackHandler.result
 
 
 async def login_openai_codex(
@@ -207,21 +231,12 @@ async def login_openai_codex(
     verifier, challenge = generate_pkce()
     state = _create_state()
 
-    params = {
-        "response_type": "code",
-        "client_id": _CLIENT_ID,
-        "redirect_uri": _REDIRECT_URI,
-        "scope": _SCOPE,
-        "code_challenge": challenge,
-        "code_challenge_method": "S256",
-        "state": state,
-        "id_token_add_organizations": "true",
-        "codex_cli_simplified_flow": "true",
-        "originator": "pi",
-    }
-    auth_url = f"{_AUTHORIZE_URL}?{urlencode(params)}"
+    auth_url = (
+        f"{_AUTHORIZE_URL}?{_AUTHORIZE_QUERY}&"
+        + urlencode({"code_challenge": challenge, "state": state})
+    )
 
-    server, wait_for_code = _start_callback_server(state)
+    server, code_result = _start_callback_server(state)
 
     on_auth(OAuthAuthInfo(
         url=auth_url,
@@ -230,33 +245,29 @@ async def login_openai_codex(
 
     code = None
     try:
-        if on_manual_code_input and server:
-            # Race between browser callback and manual input
-            loop = asyncio.get_event_loop()
-            server_task = loop.run_in_executor(None, wait_for_code)
+        if on_manual_code_input and code_result:
+            # Race between browser callback and manual input (60 s limit)
             manual_task = asyncio.ensure_future(on_manual_code_input())
 
             done, pending = await asyncio.wait(
-                [server_task, manual_task],
+                [code_result, manual_task],
+                timeout=60,
                 return_when=asyncio.FIRST_COMPLETED,
             )
 
             for task in pending:
                 task.cancel()
 
-            for task in done:
-                result = task.result()
-                if isinstance(result, str) and result:
-                    if result == wait_for_code:
-                        code = result
-                    else:
-                        parsed = _parse_authorization_input(result)
-                        code = parsed.get("code")
-                elif result:
-                    code = result
-        elif server:
+            if code_result in done:
+                code = code_result.result()
+            elif manual_task in done and manual_task.result():
+                code = _parse_authorization_input(manual_task.result()).get("code")
+        elif code_result:
             # Wait for browser callback
-            code = await asyncio.get_event_loop().run_in_executor(None, wait_for_code)
+            try:
+                code = await asyncio.wait_for(code_result, timeout=60)
+            except TimeoutError:
+                pass
 
         # Fallback to manual prompt
         if not code:
@@ -288,37 +299,40 @@ async def login_openai_codex(
     finally:
         if server:
             server.shutdown()
+            server.server_close()
 
 
 async def refresh_openai_codex_token(refresh_token: str) -> OAuthCredentials:
     """Refresh OpenAI Codex OAuth token."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            _TOKEN_URL,
-            data={
-                "grant_type": "refresh_token",
-                "refresh_token": refresh_token,
-                "client_id": _CLIENT_ID,
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+    response = await get_http_client().post(
+        _TOKEN_URL,
+        data={
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": _CLIENT_ID,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
 
     if response.status_code != 200:
         raise RuntimeError(f"Failed to refresh OpenAI Codex token: {response.text}")
 
     data = response.json()
-    if not all(k in data for k in ("access_token", "refresh_token", "expires_in")):
-        raise RuntimeError("Token refresh response missing fields")
+    try:
+        access = data["access_token"]
+        refresh = data["refresh_token"]
+        expires_in = data["expires_in"]
+    except KeyError:
+        raise RuntimeError("Token refresh response missing fields") from None
 
-    access = data["access_token"]
     account_id = _get_account_id(access)
     if not account_id:
         raise RuntimeError("Failed to extract accountId from refreshed token")
 
     return OAuthCredentials(
-        refresh=data["refresh_token"],
+        refresh=refresh,
         access=access,
-        expires=time.time() * 1000 + data["expires_in"] * 1000,
+        expires=now_ms() + int(expires_in) * 1000,
         extra={"accountId": account_id},
     )
 
@@ -346,7 +360,9 @@ class OpenAICodexOAuthProvider:
         )
 
     async def refresh_token(self, credentials: OAuthCredentials) -> OAuthCredentials:
-        return await refresh_openai_codex_token(credentials.refresh)
+        return await refresh_once(
+            self.id, credentials, lambda c: refresh_openai_codex_token(c.refresh)
+        )
 
     def get_api_key(self, credentials: OAuthCredentials) -> str:
         return credentials.access
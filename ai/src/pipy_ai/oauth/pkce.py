@@ -19,12 +19,11 @@ def generate_pkce() -> tuple[str, str]:
     Returns:
         (verifier, challenge) tuple.
     """
-    # Generate random verifier
-    verifier_bytes = os.urandom(32)
-    verifier = _base64url_encode(verifier_bytes)
+    # Generate random verifier; its base64url bytes are already the ASCII
+    # form that gets hashed, so no str round-trip is needed
+    verifier = base64.urlsafe_b64encode(os.urandom(32)).rstrip(b"=")
 
     # Compute SHA-256 challenge
-    challenge_hash = hashlib.sha256(verifier.encode("ascii")).digest()
-    challenge = _base64url_encode(challenge_hash)
+    challenge = _base64url_encode(hashlib.sha256(verifier).digest())
 
-    return verifier, challenge
+    return verifier.decode("ascii"), challenge
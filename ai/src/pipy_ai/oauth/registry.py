@@ -5,10 +5,10 @@ Port of the registry portion of pi-ai/src/utils/oauth/index.ts.
 
 from __future__ import annotations
 
-import time
 from typing import Any
 
-from .types import OAuthCredentials
+from ._litellm_patch import patch_litellm_anthropic_oauth
+from .types import OAuthCredentials, now_ms
 
 # Lazy-loaded providers to avoid import-time HTTP dependencies
 _registry: dict[str, Any] | None = None
@@ -40,7 +40,9 @@ def get_oauth_provider(provider_id: str):
     Returns:
         Provider instance, or None if not found.
     """
-    return _ensure_registry().get(provider_id)
+    # Called on every OAuth-keyed request; skip the init call once loaded
+    registry = _registry if _registry is not None else _ensure_registry()
+    return registry.get(provider_id)
 
 
 def get_oauth_providers() -> list:
@@ -77,11 +79,14 @@ async def get_oauth_api_key(
         return None
 
     # Refresh if expired
-    if time.time() * 1000 >= creds.expires:
+    if now_ms() >= creds.expires:
         try:
             creds = await provider.refresh_token(creds)
         except Exception:
             raise RuntimeError(f"Failed to refresh OAuth token for {provider_id}")
 
+    if provider_id == "anthropic":
+        # litellm needs the patch to send the token as Bearer auth
+        patch_litellm_anthropic_oauth()
     api_key = provider.get_api_key(creds)
     return {"new_credentials": creds, "api_key": api_key}
@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
 from typing import Any, Awaitable, Callable, Protocol
 
 
-@dataclass
+@dataclass(slots=True)
 class OAuthCredentials:
     """OAuth credentials for a provider."""
 
@@ -16,14 +17,19 @@ class OAuthCredentials:
     access: str
     """Access token."""
 
-    expires: float
+    expires: int
     """Expiry timestamp in milliseconds since epoch."""
 
     extra: dict[str, Any] = field(default_factory=dict)
     """Provider-specific extra data (e.g., accountId, enterpriseUrl, projectId)."""
 
 
-@dataclass
+def now_ms() -> int:
+    """Current wall-clock time in integer milliseconds, the unit of `expires`."""
+    return time.time_ns() // 1_000_000
+
+
+@dataclass(slots=True)
 class OAuthPrompt:
     """Prompt for user input during OAuth flow."""
 
@@ -32,7 +38,7 @@ class OAuthPrompt:
     allow_empty: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class OAuthAuthInfo:
     """Authorization info to show the user."""
 
@@ -24,6 +24,7 @@ from .stream import (
 )
 from .types import (
     AssistantMessage,
+    CacheRetention,
     Context,
     ImageContent,
     SimpleStreamOptions,
@@ -192,9 +193,28 @@ class LiteLLMProvider:
             kwargs["api_base"] = options.api_base
         if options.api_key:
             kwargs["api_key"] = options.api_key
-            # Anthropic OAuth tokens require Claude Code identity in system prompt
+            # Anthropic OAuth tokens require Bearer auth and Claude Code identity
             if options.api_key.startswith("sk-ant-oat") and "anthropic" in model.lower():
+                # Imported here: loading pipy_ai.oauth pulls in every OAuth provider
+                from .oauth._litellm_patch import patch_litellm_anthropic_oauth
+
+                patch_litellm_anthropic_oauth()
                 kwargs["messages"] = _inject_claude_code_identity(messages)
+        # When caching is requested, mark the system prompt as a cache breakpoint
+        # so the static prefix (tools + system) is read from Anthropic's prompt
+        # cache on later turns
+        if (
+            options.cache_retention != CacheRetention.NONE
+            and "anthropic" in model.lower()
+            and messages
+            and messages[0].get("role") == "system"
+        ):
+            control = {"type": "ephemeral"}
+            if options.cache_retention == CacheRetention.LONG:
+                control["ttl"] = "1h"
+            kwargs["cache_control_injection_points"] = [
+                {"location": "message", "role": "system", "control": control}
+            ]
         if options.headers:
             kwargs["extra_headers"] = options.headers
         # session_id can be passed via headers for providers that support cache affinity
@@ -242,7 +262,7 @@ class LiteLLMProvider:
             api="litellm",
             provider=provider,
             model=model,
-            timestamp=int(time.time() * 1000),
+            timestamp=time.time_ns() // 1_000_000,
         )
 
     # === Sync API ===
@@ -322,9 +342,9 @@ class LiteLLMProvider:
             yield StartEvent(partial=partial)
 
             text_started = False
-            text_content: list[str] = []
+            text_content = ""
             thinking_started = False
-            thinking_content: list[str] = []
+            thinking_content = ""
             current_tool_call: dict | None = None
             tool_arg_buffer = ""
 
@@ -343,8 +363,10 @@ class LiteLLMProvider:
                         )
 
                     idx = len(partial.content) - 1
-                    text_content.append(delta.content)
-                    partial.content[idx].text = "".join(text_content)
+                    # Append to the running text rather than re-joining
+                    # every delta so far on each chunk
+                    text_content += delta.content
+                    partial.content[idx].text = text_content
 
                     yield TextDeltaEvent(
                         content_index=idx,
@@ -363,8 +385,8 @@ class LiteLLMProvider:
                             partial=partial,
                         )
 
-                    thinking_content.append(reasoning)
-                    partial.content[0].thinking = "".join(thinking_content)
+                    thinking_content += reasoning
+                    partial.content[0].thinking = thinking_content
 
                     yield ThinkingDeltaEvent(
                         content_index=0,
@@ -412,14 +434,14 @@ class LiteLLMProvider:
             if text_started:
                 yield TextEndEvent(
                     content_index=len(partial.content) - 1,
-                    content="".join(text_content),
+                    content=text_content,
                     partial=partial,
                 )
 
             if thinking_started:
                 yield ThinkingEndEvent(
                     content_index=0,
-                    content="".join(thinking_content),
+                    content=thinking_content,
                     partial=partial,
                 )
 
@@ -528,9 +550,9 @@ class LiteLLMProvider:
             yield StartEvent(partial=partial)
 
             text_started = False
-            text_content: list[str] = []
+            text_content = ""
             thinking_started = False
-            thinking_content: list[str] = []
+            thinking_content = ""
             current_tool_call: dict | None = None
             tool_arg_buffer = ""
 
@@ -548,8 +570,10 @@ class LiteLLMProvider:
                         )
 
                     idx = len(partial.content) - 1
-                    text_content.append(delta.content)
-                    partial.content[idx].text = "".join(text_content)
+                    # Append to the running text rather than re-joining
+                    # every delta so far on each chunk
+                    text_content += delta.content
+                    partial.content[idx].text = text_content
 
                     yield TextDeltaEvent(
                         content_index=idx,
@@ -567,8 +591,8 @@ class LiteLLMProvider:
                             partial=partial,
                         )
 
-                    thinking_content.append(reasoning)
-                    partial.content[0].thinking = "".join(thinking_content)
+                    thinking_content += reasoning
+                    partial.content[0].thinking = thinking_content
 
                     yield ThinkingDeltaEvent(
                         content_index=0,
@@ -614,14 +638,14 @@ class LiteLLMProvider:
             if text_started:
                 yield TextEndEvent(
                     content_index=len(partial.content) - 1,
-                    content="".join(text_content),
+                    content=text_content,
                     partial=partial,
                 )
 
             if thinking_started:
                 yield ThinkingEndEvent(
                     content_index=0,
-                    content="".join(thinking_content),
+                    content=thinking_content,
                     partial=partial,
                 )
 
@@ -686,12 +710,11 @@ class LiteLLMProvider:
         """Async completion with reasoning support."""
         return await self.acomplete(model, context, options)
 
-    async def astream_simple(
+    def astream_simple(
         self,
         model: str,
         context: Context,
         options: SimpleStreamOptions | None = None,
     ) -> AsyncIterator[AssistantMessageEvent]:
         """Async streaming with reasoning support."""
-        async for event in self.astream(model, context, options):
-            yield event
+        return self.astream(model, context, options)
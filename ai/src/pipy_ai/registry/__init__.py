@@ -26,7 +26,7 @@ def get_models(
     min_context: int | None = None,
     max_cost_input: float | None = None,
 ) -> list[Model]:
-    """Query models with filters.
+    """Query models with filters, ordered by qualified name.
 
     Args:
         provider: Filter by provider (e.g., "anthropic")
@@ -46,10 +46,8 @@ def get_models(
         get_models(min_context=100000, max_cost_input=1.0)
     """
     registry = get_registry()
-    models = registry.list_all()
+    models = registry.list_by_provider(provider) if provider else registry.list_all()
 
-    if provider:
-        models = [m for m in models if m.provider == provider]
     if capability:
         models = [m for m in models if getattr(m.capabilities, capability, False)]
     if modality:
@@ -1,6 +1,7 @@
 """Runtime model registry."""
 
 import logging
+from bisect import bisect_left
 from typing import Any
 
 from .schema import Model
@@ -35,7 +36,11 @@ class ModelRegistry:
     """
 
     def __init__(self, auto_sync: bool = True):
+        # Insertion (models.dev) order, which short-name lookup relies on
         self._models: dict[str, Model] = {}
+        # Qualified names and models in sorted order, built once for listings
+        self._sorted_keys: list[str] = []
+        self._sorted_models: list[Model] = []
         self._auto_sync = auto_sync
         self._load()
 
@@ -60,6 +65,8 @@ class ModelRegistry:
                 key = f"{provider_id}/{model_id}"
                 self._models[key] = model
 
+        self._sorted_keys = sorted(self._models)
+        self._sorted_models = [self._models[key] for key in self._sorted_keys]
         logger.debug(f"Loaded {len(self._models)} models")
 
     def get(self, name: str) -> Model | None:
@@ -84,12 +91,15 @@ class ModelRegistry:
         return None
 
     def list_all(self) -> list[Model]:
-        """List all models."""
-        return list(self._models.values())
+        """List all models, ordered by qualified name."""
+        return self._sorted_models[:]
 
     def list_by_provider(self, provider: str) -> list[Model]:
-        """List models from a specific provider."""
-        return [m for m in self._models.values() if m.provider == provider]
+        """List models from a specific provider, ordered by qualified name."""
+        # A provider's keys share the "provider/" prefix, so they are contiguous
+        start = bisect_left(self._sorted_keys, f"{provider}/")
+        end = bisect_left(self._sorted_keys, f"{provider}0", start)  # "0" follows "/"
+        return self._sorted_models[start:end]
 
     def list_by_capability(self, capability: str) -> list[Model]:
         """List models with a specific capability.
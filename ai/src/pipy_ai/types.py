@@ -194,7 +194,8 @@ class StreamOptions(BaseModel):
 
     temperature: float | None = None
     max_tokens: int | None = None
-    cache_retention: CacheRetention = CacheRetention.SHORT
+    # Opt-in: cache writes cost more than plain input tokens
+    cache_retention: CacheRetention = CacheRetention.NONE
     session_id: str | None = None  # Passed via x-session-id header for cache affinity
     headers: dict[str, str] | None = None  # Custom headers (merged with session_id)
     api_key: str | None = None
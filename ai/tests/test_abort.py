@@ -37,6 +37,11 @@ class TestAbortController:
         controller.abort()
         assert controller.signal.aborted is True
 
+    def test_slotted(self):
+        controller = AbortController()
+        assert not hasattr(controller, "__dict__")
+        assert not hasattr(controller.signal, "__dict__")
+
     def test_abort_is_idempotent(self):
         controller = AbortController()
         controller.abort()
@@ -84,6 +89,21 @@ class TestAbortCallbacks:
         controller.abort()
         assert called == []
 
+    def test_unsubscribe_only_removes_own_registration(self):
+        controller = AbortController()
+        called = []
+
+        def cb():
+            called.append(1)
+
+        unsub = controller.signal.on_abort(cb)
+        controller.signal.on_abort(cb)
+        unsub()
+        unsub()  # Repeat calls are no-ops
+
+        controller.abort()
+        assert called == [1]
+
     def test_callback_error_doesnt_stop_others(self):
         controller = AbortController()
         called = []
@@ -1,5 +1,7 @@
 """Tests for API module."""
 
+import pytest
+
 from pipy_ai import (
     AssistantMessage,
     Context,
@@ -38,6 +40,7 @@ class TestContextBuilders:
 
         context = ctx(msg1, msg2, msg3)
         assert len(context.messages) == 3
+        assert isinstance(context.messages, list)
 
 
 class TestContextModel:
@@ -59,3 +62,44 @@ class TestContextModel:
             ]
         )
         assert len(context.messages) == 1
+
+
+class TestPackageExports:
+    def test_all_exports_resolve(self):
+        import pipy_ai
+
+        for name in pipy_ai.__all__:
+            assert getattr(pipy_ai, name) is not None
+
+    def test_lazy_exports_match_type_checking_imports(self):
+        import ast
+        import inspect
+
+        import pipy_ai
+
+        tree = ast.parse(inspect.getsource(pipy_ai))
+        block = next(
+            node
+            for node in tree.body
+            if isinstance(node, ast.If) and ast.unparse(node.test) == "TYPE_CHECKING"
+        )
+        type_checking = {
+            alias.asname or alias.name
+            for node in ast.walk(block)
+            if isinstance(node, ast.ImportFrom)
+            for alias in node.names
+        }
+        assert type_checking == set(pipy_ai._LAZY_IMPORTS)
+        assert set(pipy_ai._LAZY_IMPORTS) <= set(pipy_ai.__all__)
+
+    def test_stream_is_api_function(self):
+        import pipy_ai
+        from pipy_ai import api
+
+        assert pipy_ai.stream is api.stream
+
+    def test_unknown_attribute_raises(self):
+        import pipy_ai
+
+        with pytest.raises(AttributeError):
+            _ = pipy_ai.not_an_export
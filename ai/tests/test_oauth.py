@@ -1,11 +1,17 @@
 """Tests for OAuth module."""
 
+import asyncio
+import time
+
 from pipy_ai.oauth import (
+    OAuthCredentials,
+    aclose_http_client,
     generate_pkce,
     get_oauth_provider,
     get_oauth_providers,
-    OAuthCredentials,
 )
+from pipy_ai.oauth._http import get_http_client
+from pipy_ai.oauth._refresh import refresh_once
 from pipy_ai.oauth.pkce import _base64url_encode
 
 
@@ -107,3 +113,69 @@ class TestOAuthCredentials:
             extra={"accountId": "abc123"},
         )
         assert creds.extra["accountId"] == "abc123"
+
+    def test_credentials_slotted(self):
+        creds = OAuthCredentials(refresh="refresh", access="access", expires=0)
+        assert not hasattr(creds, "__dict__")
+
+
+class TestSharedHttpClient:
+    def test_reused_within_event_loop(self):
+        async def get_twice():
+            clients = get_http_client(), get_http_client()
+            await aclose_http_client()
+            return clients
+
+        first, second = asyncio.run(get_twice())
+        assert first is second
+
+    def test_new_client_for_new_event_loop(self):
+        async def get():
+            client = get_http_client()
+            await aclose_http_client()
+            return client
+
+        assert asyncio.run(get()) is not asyncio.run(get())
+
+    async def test_aclose_closes_and_replaces_client(self):
+        client = get_http_client()
+        await aclose_http_client()
+        assert client.is_closed
+
+        replacement = get_http_client()
+        assert replacement is not client
+        await aclose_http_client()
+        await aclose_http_client()  # No client left: nothing to do
+
+
+class TestRefreshOnce:
+    async def test_concurrent_refreshes_coalesce(self):
+        calls = []
+
+        async def refresh(creds):
+            calls.append(creds.refresh)
+            await asyncio.sleep(0.01)
+            return OAuthCredentials(
+                refresh="new", access="tok", expires=time.time() * 1000 + 60_000
+            )
+
+        expired = OAuthCredentials(refresh="coalesce-old", access="stale", expires=0)
+        results = await asyncio.gather(
+            *(refresh_once("test-provider", expired, refresh) for _ in range(5))
+        )
+
+        assert calls == ["coalesce-old"]
+        assert all(r is results[0] for r in results)
+
+    async def test_expired_result_refreshed_again(self):
+        calls = []
+
+        async def refresh(creds):
+            calls.append(creds.refresh)
+            return OAuthCredentials(refresh="new", access="tok", expires=0)
+
+        expired = OAuthCredentials(refresh="expired-old", access="stale", expires=0)
+        await refresh_once("test-provider", expired, refresh)
+        await refresh_once("test-provider", expired, refresh)
+
+        assert calls == ["expired-old", "expired-old"]
@@ -1,6 +1,13 @@
 """Tests for GitHub Copilot OAuth helpers."""
 
+from types import SimpleNamespace
+
+import pytest
+
+from pipy_ai.oauth import github_copilot
 from pipy_ai.oauth.github_copilot import (
+    _get_urls,
+    _poll_for_access_token,
     normalize_domain,
     get_github_copilot_base_url,
 )
@@ -23,6 +30,16 @@ class TestNormalizeDomain:
         assert normalize_domain("   ") is None
 
 
+class TestGetUrls:
+    def test_urls_for_domain(self):
+        urls = _get_urls("company.ghe.com")
+        assert urls["device_code"] == "https://company.ghe.com/login/device/code"
+        assert urls["copilot_token"] == "https://api.company.ghe.com/copilot_internal/v2/token"
+
+    def test_cached_per_domain(self):
+        assert _get_urls("github.com") is _get_urls("github.com")
+
+
 class TestGetBaseUrl:
     def test_default(self):
         url = get_github_copilot_base_url()
@@ -42,3 +59,41 @@ class TestGetBaseUrl:
         token = "tid=abc;exp=123;proxy-ep=custom.host.com;sku=abc"
         url = get_github_copilot_base_url(token=token)
         assert url == "https://custom.host.com"
+
+
+class _FakeClient:
+    """Answers each device-flow poll with the next canned JSON body."""
+
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+
+    async def post(self, url, json=None, headers=None):
+        body = self.bodies.pop(0)
+        return SimpleNamespace(json=lambda: body)
+
+
+class TestPollForAccessToken:
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        recorded = []
+
+        async def fake_sleep(seconds):
+            recorded.append(seconds)
+
+        monkeypatch.setattr(github_copilot.asyncio, "sleep", fake_sleep)
+        return recorded
+
+    async def test_pending_then_slow_down_then_token(self, sleeps):
+        client = _FakeClient(
+            {"error": "authorization_pending"},
+            {"error": "slow_down"},
+            {"access_token": "gho_abc"},
+        )
+        token = await _poll_for_access_token(client, "github.com", "dev", 5, 900)
+        assert token == "gho_abc"
+        assert sleeps == [5, 10]
+
+    async def test_other_error_raises(self, sleeps):
+        client = _FakeClient({"error": "access_denied"})
+        with pytest.raises(RuntimeError, match="access_denied"):
+            await _poll_for_access_token(client, "github.com", "dev", 5, 900)
@@ -1,5 +1,6 @@
 """Tests for the litellm Anthropic OAuth patch."""
 
+from pipy_ai.oauth import _litellm_patch
 from pipy_ai.oauth._litellm_patch import patch_litellm_anthropic_oauth
 
 
@@ -61,3 +62,13 @@ class TestLiteLLMAnthropicOAuthPatch:
         beta_parts = [b.strip() for b in headers["anthropic-beta"].split(",")]
         assert beta_parts.count("oauth-2025-04-20") == 1
         assert beta_parts.count("claude-code-20250219") == 1
+
+    def test_marked_patch_not_wrapped_again(self, monkeypatch):
+        """A patch applied by another copy of the module is left alone."""
+        from litellm.llms.anthropic.chat.transformation import AnthropicConfig
+
+        patched = AnthropicConfig.get_anthropic_headers
+        assert patched._pipy_oauth_patch
+        monkeypatch.setattr(_litellm_patch, "_patched", False)
+        patch_litellm_anthropic_oauth()
+        assert AnthropicConfig.get_anthropic_headers is patched
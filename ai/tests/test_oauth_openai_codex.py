@@ -4,9 +4,14 @@ from pipy_ai.oauth.openai_codex import (
     _parse_authorization_input,
     _decode_jwt_payload,
     _get_account_id,
+    _start_callback_server,
 )
+import asyncio
 import base64
 import json
+import urllib.request
+
+import pytest
 
 
 class TestParseAuthorizationInput:
@@ -37,7 +42,8 @@ class TestParseAuthorizationInput:
 
 class TestJWTDecode:
     def _make_jwt(self, payload: dict) -> str:
-        header = base64.urlsafe_b64encode(json.dumps({"alg": "RS256"}).encode()).rstrip(b"=").decode()
+        header_json = json.dumps({"alg": "RS256"}).encode()
+        header = base64.urlsafe_b64encode(header_json).rstrip(b"=").decode()
         body = base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=").decode()
         sig = base64.urlsafe_b64encode(b"fake-signature").rstrip(b"=").decode()
         return f"{header}.{body}.{sig}"
@@ -47,6 +53,13 @@ class TestJWTDecode:
         result = _decode_jwt_payload(jwt)
         assert result == {"sub": "user123"}
 
+    def test_decode_urlsafe_payload(self):
+        # "~~~" and "???" encode to "-" and "_" in the base64url alphabet
+        payload = {"a": "~~~", "b": "???"}
+        jwt = self._make_jwt(payload)
+        assert "-" in jwt.split(".")[1] and "_" in jwt.split(".")[1]
+        assert _decode_jwt_payload(jwt) == payload
+
     def test_decode_invalid_jwt(self):
         assert _decode_jwt_payload("not.a.jwt") is None
         assert _decode_jwt_payload("invalid") is None
@@ -62,3 +75,18 @@ class TestJWTDecode:
     def test_get_account_id_missing(self):
         jwt = self._make_jwt({"sub": "user"})
         assert _get_account_id(jwt) is None
+
+
+class TestCallbackServer:
+    async def test_callback_resolves_code_future(self):
+        server, code_result = _start_callback_server("s1")
+        if server is None:
+            pytest.skip("callback port in use")
+        try:
+            url = "http://127.0.0.1:1455/auth/callback?code=c1&state=s1"
+            status = await asyncio.to_thread(lambda: urllib.request.urlopen(url).status)
+            assert status == 200
+            assert await asyncio.wait_for(code_result, timeout=1) == "c1"
+        finally:
+            server.shutdown()
+            server.server_close()
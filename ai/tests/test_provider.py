@@ -1,7 +1,12 @@
 """Tests for provider module."""
 
+from types import SimpleNamespace
+
+from pipy_ai import provider as provider_module
 from pipy_ai.provider import LiteLLMProvider, supports_xhigh
 from pipy_ai.types import (
+    CacheRetention,
+    Context,
     SimpleStreamOptions,
     StreamOptions,
     ThinkingBudgets,
@@ -100,6 +105,9 @@ class TestBuildKwargs:
         options = StreamOptions(api_key=oauth_token)
         kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", self.messages, options)
         assert kwargs["api_key"] == oauth_token
+        from litellm.llms.anthropic.chat.transformation import AnthropicConfig
+        headers = AnthropicConfig().get_anthropic_headers(api_key=oauth_token)
+        assert headers["authorization"] == f"Bearer {oauth_token}"
 
     def test_anthropic_oauth_token_injects_identity(self):
         """OAuth tokens trigger Claude Code identity injection as separate system message."""
@@ -124,6 +132,50 @@ class TestBuildKwargs:
         assert kwargs["messages"][0]["content"] == "Be helpful"
 
 
+class TestPromptCaching:
+    """Test cache breakpoint injection for the system prompt."""
+
+    def setup_method(self):
+        self.provider = LiteLLMProvider()
+        self.messages = [
+            {"role": "system", "content": "Be helpful"},
+            {"role": "user", "content": "hi"},
+        ]
+
+    def test_not_marked_by_default(self):
+        kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", self.messages, None)
+        assert "cache_control_injection_points" not in kwargs
+
+    def test_short_retention_marks_system_prompt(self):
+        options = StreamOptions(cache_retention=CacheRetention.SHORT)
+        kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", self.messages, options)
+        assert kwargs["cache_control_injection_points"] == [
+            {"location": "message", "role": "system", "control": {"type": "ephemeral"}}
+        ]
+
+    def test_long_retention_uses_1h_ttl(self):
+        options = StreamOptions(cache_retention=CacheRetention.LONG)
+        kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", self.messages, options)
+        control = kwargs["cache_control_injection_points"][0]["control"]
+        assert control == {"type": "ephemeral", "ttl": "1h"}
+
+    def test_no_retention_not_marked(self):
+        options = StreamOptions(cache_retention=CacheRetention.NONE)
+        kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", self.messages, options)
+        assert "cache_control_injection_points" not in kwargs
+
+    def test_non_anthropic_not_marked(self):
+        options = StreamOptions(cache_retention=CacheRetention.SHORT)
+        kwargs = self.provider._build_kwargs("openai/gpt-4o", self.messages, options)
+        assert "cache_control_injection_points" not in kwargs
+
+    def test_no_system_prompt_not_marked(self):
+        messages = [{"role": "user", "content": "hi"}]
+        options = StreamOptions(cache_retention=CacheRetention.SHORT)
+        kwargs = self.provider._build_kwargs("anthropic/claude-sonnet-4-5", messages, options)
+        assert "cache_control_injection_points" not in kwargs
+
+
 class TestReasoningKwargs:
     """Test reasoning/thinking level handling."""
 
@@ -234,3 +286,36 @@ class TestThinkingBudgets:
         )
         kwargs = self.provider._build_kwargs("claude-3", self.messages, options)
         assert "thinking" not in kwargs
+
+
+def _chunk(content=None, reasoning=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, reasoning_content=reasoning, tool_calls=None)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class TestStreamAccumulation:
+    """Test text and thinking accumulation while streaming."""
+
+    def test_partial_text_grows_per_delta(self, monkeypatch):
+        chunks = [
+            _chunk(reasoning="Let me "),
+            _chunk(reasoning="think."),
+            _chunk(content="Hello"),
+            _chunk(content=", "),
+            _chunk(content="world", finish_reason="stop"),
+        ]
+        monkeypatch.setattr(provider_module, "completion", lambda **kwargs: iter(chunks))
+
+        events, seen = [], []
+        for event in LiteLLMProvider().stream("gpt-4", Context()):
+            if event.type == "text_delta":
+                # Snapshot now: the partial keeps growing after this event
+                seen.append(event.partial.content[event.content_index].text)
+            events.append(event)
+
+        assert seen == ["Hello", "Hello, ", "Hello, world"]
+        ends = {e.type: e.content for e in events if e.type in ("text_end", "thinking_end")}
+        assert ends == {"text_end": "Hello, world", "thinking_end": "Let me think."}
+        assert events[-1].type == "done"
+        assert events[-1].message.content[0].thinking == "Let me think."
+        assert events[-1].message.content[1].text == "Hello, world"
@@ -3,7 +3,7 @@
 import pytest
 
 from pipy_ai import Usage
-from pipy_ai.registry import calculate_cost
+from pipy_ai.registry import ModelRegistry, calculate_cost
 from pipy_ai.registry.schema import (
     Model,
     ModelCapabilities,
@@ -112,6 +112,35 @@ class TestModel:
         assert model.knowledge_cutoff == "2025-04"
 
 
+class TestModelRegistry:
+    def test_models_listed_in_qualified_name_order(self):
+        registry = ModelRegistry(auto_sync=False)
+        registry._models = {}
+        registry._parse_models(
+            {
+                "openai": {"models": {"gpt-4o": {}, "gpt-4": {}}},
+                "anthropic": {"models": {"claude-sonnet-4-5": {}}},
+            }
+        )
+        names = [m.qualified_name for m in registry.list_all()]
+        assert names == ["anthropic/claude-sonnet-4-5", "openai/gpt-4", "openai/gpt-4o"]
+        openai = [m.qualified_name for m in registry.list_by_provider("openai")]
+        assert openai == ["openai/gpt-4", "openai/gpt-4o"]
+        assert registry.list_by_provider("open") == []
+
+    def test_short_name_resolves_in_source_order(self):
+        registry = ModelRegistry(auto_sync=False)
+        registry._models = {}
+        registry._parse_models(
+            {
+                "openrouter": {"models": {"gpt-4o": {}}},
+                "azure": {"models": {"gpt-4o": {}}},
+            }
+        )
+        assert registry.get("gpt-4o").provider == "openrouter"
+        assert registry.get("azure/gpt-4o").provider == "azure"
+
+
 class TestCalculateCost:
     def test_calculate_cost(self):
         model = Model(
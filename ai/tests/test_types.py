@@ -201,7 +201,7 @@ class TestOptions:
         opts = StreamOptions()
         assert opts.temperature is None
         assert opts.max_tokens is None
-        assert opts.cache_retention == CacheRetention.SHORT
+        assert opts.cache_retention == CacheRetention.NONE
 
     def test_simple_stream_options_reasoning(self):
         opts = SimpleStreamOptions(reasoning=ThinkingLevel.HIGH)
@@ -390,7 +390,7 @@ class AgentSession:
         self._settings.reload()
         self._resources = DefaultResourceLoader(cwd=self._cwd)
         self._system_prompt = self._build_system_prompt()
-        self._agent._system_prompt = self._system_prompt
+        self._agent.set_system_prompt(self._system_prompt)
 
     def export_html(self) -> str:
         """Export session to HTML."""
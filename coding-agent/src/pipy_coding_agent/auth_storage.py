@@ -160,7 +160,7 @@ class AuthStorage:
             )
 
             # Check if token needs refresh
-            if time.time() * 1000 >= oauth_creds.expires:
+            if time.time_ns() // 1_000_000 >= oauth_creds.expires:
                 try:
                     refreshed = await provider.refresh_token(oauth_creds)
                     self.set_oauth(provider_id, refreshed)
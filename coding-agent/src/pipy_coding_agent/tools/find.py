@@ -132,6 +132,7 @@ def create_find_tool(
     class FindTool(AgentTool):
         name: str = "find"
         label: str = "find"
+        concurrent: bool = True
         description: str = (
             f"Search for files by glob pattern. Returns matching file paths relative to the search directory. "
             f"Respects .gitignore. Output is truncated to {DEFAULT_LIMIT} results or "
@@ -156,6 +156,7 @@ def create_grep_tool(
     class GrepTool(AgentTool):
         name: str = "grep"
         label: str = "grep"
+        concurrent: bool = True
         description: str = (
             f"Search file contents for a pattern. Returns matching lines with file paths and line numbers. "
             f"Respects .gitignore. Output is truncated to {DEFAULT_LIMIT} matches or "
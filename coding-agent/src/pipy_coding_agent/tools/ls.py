@@ -95,6 +95,7 @@ def create_ls_tool(
     class LsTool(AgentTool):
         name: str = "ls"
         label: str = "ls"
+        concurrent: bool = True
         description: str = (
             f"List directory contents. Returns entries sorted alphabetically, with '/' suffix for directories. "
             f"Includes dotfiles. Output is truncated to {DEFAULT_LIMIT} entries or "
@@ -125,6 +125,7 @@ def create_read_tool(
     class ReadTool(AgentTool):
         name: str = "read"
         label: str = "read"
+        concurrent: bool = True
         description: str = (
             f"Read the contents of a file. Supports text files and images (jpg, png, gif, webp). "
             f"Images are sent as attachments. For text files, output is truncated to {DEFAULT_MAX_LINES} lines "